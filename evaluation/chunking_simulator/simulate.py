@@ -0,0 +1,251 @@
+"""
+Offline simulation of chunking settings, to size an experiment before ingesting anything.
+
+For every (chunk size, chunk overlap) setting the corpus is chunked locally with a splitter
+that mimics the `basic` strategy of `unstructured` and the following is reported:
+number of chunks, chunk size distribution, embedding tokens, chunks exceeding the context
+of the embedding model, projected vector bytes and a projected HNSW index size.
+
+The splitter packs paragraphs (the elements) into chunks of at most `chunk_size` characters
+and splits paragraphs longer than that into windows overlapping by `chunk_overlap` characters,
+like `unstructured` does with `max_characters`, `new_after_n_chars` and `overlap`.
+It doesn't partition PDFs or images, only text, markdown and HTML files are read.
+
+By default the settings are the unique (chunk_size, chunk_overlap) pairs of `experiments.csv`.
+The files are chunked in parallel, one task per file and setting.
+
+Usage (from the `evaluation` folder):
+    python -m chunking_simulator.simulate ragas_eval/data --output chunking.csv
+    python -m chunking_simulator.simulate ragas_eval/data --chunk-sizes 512 1024 --chunk-overlaps 0 128
+"""
+
+# pylint: disable=C0116
+# pylint: disable=C0301
+
+import os
+import re
+import sys
+import argparse
+import itertools
+import dataclasses
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Tuple, Callable, Union, Final, Any
+
+import numpy as np
+import pandas as pd
+
+EXTENSIONS: Final[Tuple[str, ...]] = (".txt", ".md", ".html", ".htm")
+
+# Without a tokenizer the tokens are estimated from the characters, ~4 per token for English text
+CHARS_PER_TOKEN: Final[float] = 4.0
+
+# `mxbai-embed-large` truncates its input after 512 tokens
+DEFAULT_MAX_TOKENS: Final[int] = 512
+
+# Bytes of a pgvector `vector`: 4 per dimension plus its header
+VECTOR_HEADER_BYTES: Final[int] = 8
+# Bytes of an HNSW element besides the vector: tuple headers and the neighbour list,
+# i.e. 2 * m item pointers (6 bytes each) on layer 0 and m on the layers above
+HNSW_TUPLE_OVERHEAD_BYTES: Final[int] = 64
+ITEM_POINTER_BYTES: Final[int] = 6
+# Pages are never completely filled
+PAGE_FILL_FACTOR: Final[float] = 0.9
+
+_PARAGRAPH_BREAK: Final[re.Pattern] = re.compile(r"\n\s*\n")
+
+@dataclasses.dataclass(frozen=True)
+class ChunkSetting:
+    chunk_size: int
+    chunk_overlap: int
+
+def load_settings(experiments_path: str, sizes: List[int], overlaps: List[int]) -> List[ChunkSetting]:
+    """
+    All combinations of `sizes` and `overlaps` if given, otherwise the unique settings of the experiments.
+    """
+    if sizes:
+        combinations = itertools.product(sizes, overlaps or [0])
+    else:
+        experiments: pd.DataFrame = pd.read_csv(experiments_path)
+        combinations = experiments[["chunk_size", "chunk_overlap"]].drop_duplicates().itertuples(index=False)
+
+    settings: List[ChunkSetting] = []
+    for size, overlap in combinations:
+        if overlap >= size:
+            raise ValueError(f"The overlap ({overlap}) must be smaller than the chunk size ({size})!")
+        settings.append(ChunkSetting(int(size), int(overlap)))
+    return settings
+
+def _to_text(path: str) -> str:
+    with open(file=path, mode="r", encoding="utf-8", errors="replace") as f:
+        content: str = f.read()
+
+    if path.endswith(".txt"):
+        return content
+
+    from bs4 import BeautifulSoup # pylint: disable=C0415
+    if path.endswith(".md"):
+        import markdown # pylint: disable=C0415
+        content = markdown.markdown(content)
+    # Block elements are separated by blank lines, so that paragraphs survive
+    return BeautifulSoup(content, features="html.parser").get_text("\n\n")
+
+def load_corpus(corpus_dir: str) -> Dict[str, str]:
+    """
+    Text of every supported file below `corpus_dir`, by relative path.
+    """
+    corpus: Dict[str, str] = {}
+    for root, _, files in os.walk(corpus_dir):
+        for name in sorted(files):
+            if name.lower().endswith(EXTENSIONS) and name != "README.md":
+                path: str = os.path.join(root, name)
+                corpus[os.path.relpath(path, corpus_dir)] = _to_text(path)
+    return corpus
+
+def split_text(text: str, setting: ChunkSetting) -> List[str]:
+    """
+    Packs whole paragraphs into chunks of at most `chunk_size` characters.
+    A paragraph that doesn't fit into a chunk on its own is split into windows
+    of `chunk_size` characters, each starting `chunk_overlap` characters before the previous end.
+    """
+    chunks: List[str] = []
+    current: str = ""
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+
+        if len(paragraph) > setting.chunk_size:
+            if current:
+                chunks.append(current)
+                current = ""
+            step: int = setting.chunk_size - setting.chunk_overlap
+            for start in range(0, len(paragraph) - setting.chunk_overlap, step):
+                chunks.append(paragraph[start:start + setting.chunk_size])
+            continue
+
+        candidate: str = f"{current}\n\n{paragraph}" if current else paragraph
+        if len(candidate) > setting.chunk_size:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = candidate
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+# Set in every worker process by `_init_worker`
+_count_tokens: Union[Callable[[str], int], None] = None
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, round(len(text) / CHARS_PER_TOKEN))
+
+def _init_worker(tokenizer: Union[str, None]):
+    global _count_tokens # pylint: disable=W0603
+    if tokenizer is None:
+        _count_tokens = _estimate_tokens
+        return
+
+    try:
+        from transformers import AutoTokenizer # pylint: disable=C0415
+    except ImportError as e:
+        raise ValueError("Counting tokens with a tokenizer requires `transformers`: pip install transformers") from e
+
+    loaded = AutoTokenizer.from_pretrained(tokenizer)
+    _count_tokens = lambda text: len(loaded.encode(text, add_special_tokens=True)) # pylint: disable=C3001
+
+def _simulate_file(task: Tuple[ChunkSetting, str]) -> Tuple[ChunkSetting, np.ndarray, np.ndarray]:
+    """
+    Runs in a worker process. Returns the characters and tokens of every chunk of the text.
+    """
+    setting, text = task
+    chunks: List[str] = split_text(text, setting)
+    return (
+        setting,
+        np.fromiter((len(chunk) for chunk in chunks), dtype=np.int64, count=len(chunks)),
+        np.fromiter((_count_tokens(chunk) for chunk in chunks), dtype=np.int64, count=len(chunks))
+    )
+
+def projected_index_bytes(chunks: int, dimension: int, m: int) -> int:
+    """
+    Rough size of an HNSW index (pgvector) over `chunks` vectors.
+    Every element stores its vector and 2 * m neighbours on layer 0. A fraction of 1 / m
+    of the elements reaches each higher layer, with m neighbours there.
+    """
+    upper_layer_links: float = m * (1 / (m - 1)) if m > 1 else 0
+    element: float = (
+        dimension * 4 + VECTOR_HEADER_BYTES + HNSW_TUPLE_OVERHEAD_BYTES
+        + (2 * m + upper_layer_links) * ITEM_POINTER_BYTES
+    )
+    return int(chunks * element / PAGE_FILL_FACTOR)
+
+def simulate(
+    corpus: Dict[str, str],
+    settings: List[ChunkSetting],
+    dimension: int,
+    max_tokens: int,
+    m: int,
+    workers: Union[int, None] = None,
+    tokenizer: Union[str, None] = None
+) -> pd.DataFrame:
+    tasks: List[Tuple[ChunkSetting, str]] = [(setting, text) for setting in settings for text in corpus.values()]
+    chars: Dict[ChunkSetting, List[np.ndarray]] = {setting: [] for setting in settings}
+    tokens: Dict[ChunkSetting, List[np.ndarray]] = {setting: [] for setting in settings}
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tokenizer, )) as pool:
+        for setting, file_chars, file_tokens in pool.map(_simulate_file, tasks, chunksize=16):
+            chars[setting].append(file_chars)
+            tokens[setting].append(file_tokens)
+
+    rows: List[Dict[str, Any]] = []
+    for setting in settings:
+        setting_chars: np.ndarray = np.concatenate(chars[setting]) if chars[setting] else np.zeros(0, dtype=np.int64)
+        setting_tokens: np.ndarray = np.concatenate(tokens[setting]) if tokens[setting] else np.zeros(0, dtype=np.int64)
+        count: int = len(setting_chars)
+        rows.append({
+            "chunk_size": setting.chunk_size,
+            "chunk_overlap": setting.chunk_overlap,
+            "chunks": count,
+            "chars_mean": round(float(setting_chars.mean()), 1) if count else 0,
+            "chars_p50": int(np.percentile(setting_chars, 50)) if count else 0,
+            "chars_p95": int(np.percentile(setting_chars, 95)) if count else 0,
+            "chars_max": int(setting_chars.max()) if count else 0,
+            "embedding_tokens": int(setting_tokens.sum()),
+            f"over_{max_tokens}_tokens": int((setting_tokens > max_tokens).sum()),
+            "vector_bytes": count * (dimension * 4 + VECTOR_HEADER_BYTES),
+            "index_bytes": projected_index_bytes(count, dimension, m)
+        })
+    return pd.DataFrame(rows)
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Simulate chunking settings before ingesting a corpus.")
+    parser.add_argument("corpus", help="Folder containing the .txt, .md and .html files")
+    parser.add_argument("--experiments", default="../experiments.csv", help="Settings to simulate, unless --chunk-sizes is given")
+    parser.add_argument("--chunk-sizes", type=int, nargs="*", default=[])
+    parser.add_argument("--chunk-overlaps", type=int, nargs="*", default=[])
+    parser.add_argument("--dimension", type=int, default=1024, help="Dimension of the embeddings (`base_dimension`)")
+    parser.add_argument("--max-tokens", type=int, default=DEFAULT_MAX_TOKENS, help="Context of the embedding model")
+    parser.add_argument("--m", type=int, default=16, help="`m` of the HNSW index")
+    parser.add_argument("--tokenizer", help="Hugging Face tokenizer to count tokens with, e.g. mixedbread-ai/mxbai-embed-large-v1")
+    parser.add_argument("--workers", type=int, help="Worker processes, all cores by default")
+    parser.add_argument("--output", help="Write the report to this CSV file")
+    args = parser.parse_args(argv)
+
+    settings: List[ChunkSetting] = load_settings(args.experiments, args.chunk_sizes, args.chunk_overlaps)
+    corpus: Dict[str, str] = load_corpus(args.corpus)
+    if not corpus:
+        raise ValueError(f"No {', '.join(EXTENSIONS)} files found in {args.corpus}!")
+    print(f"{len(settings)} chunk settings, {len(corpus)} files, {sum(map(len, corpus.values())):,} characters")
+
+    report: pd.DataFrame = simulate(
+        corpus, settings, args.dimension, args.max_tokens, args.m, args.workers, args.tokenizer
+    )
+
+    print(report.to_string(index=False))
+    if args.output:
+        report.to_csv(args.output, index=False)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
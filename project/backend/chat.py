@@ -5,11 +5,16 @@
 # pylint: disable=W0719
 # pylint: disable=R0903
 
-from typing import Union, List, Dict, Final, Any
+from typing import Union, List, Dict, Set, Final, Optional, Any
 
 import requests
 import streamlit as st
 
+from backend.prompt import RegisteredPrompt, prompt_registry
+from backend.chunking_collections import collection_filter
+from backend.near_duplicates import drop_near_duplicates
+from backend.system import send_authorized
+
 # https://r2r-docs.sciphi.ai/api-and-sdks/retrieval/search-app
 SEARCH_SETTINGS: Final[Dict[str, Any]] = {
     "use_semantic_search": True,
@@ -34,54 +39,137 @@ RAG_GENERATION_CONFIG: Final[Dict[str, Any]] = {
     "stream": False
 }
 
-def retrieve_messages(conversation_id: str) -> Union[List[Dict[str, str]], None]:
-    response: requests.Response = requests.get(
-        url=f"http://r2r:7272/v3/conversations/{conversation_id}",
-        headers={
-            "Authorization": f"Bearer {st.session_state['bearer_token']}"
-        },
-        timeout=5
+def _conversation_cache() -> Dict[str, List[Dict[str, str]]]:
+    """
+    Per session cache of the messages of every conversation seen so far.
+    Maps the conversation id to its messages (id, parent_id, role and content), in insertion order.
+    """
+    return st.session_state['conversation_cache']
+
+def _to_message(obj: Dict[str, Any]) -> Dict[str, str]:
+    # The parent is stored alongside the message, see `add_message`
+    metadata: Dict[str, Any] = obj.get("metadata") or {}
+    return {
+        "id": obj["id"],
+        "parent_id": obj.get("parent_id", metadata.get("parent_id")),
+        "role": obj["message"]["role"],
+        "content": obj["message"]["content"]
+    }
+
+def _build_tree_index(messages: List[Dict[str, str]]) -> Dict[str, Union[str, None]]:
+    """
+    Maps each message id to the id of its parent.
+    Messages stored before the parent id was kept in the metadata carry no parent,
+    they're treated as linear - each such message follows the previous one.
+    Conversations started before that change mix both kinds of messages.
+    """
+    return {
+        msg["id"]: msg["parent_id"] if msg["parent_id"] is not None else (messages[i - 1]["id"] if i > 0 else None)
+        for i, msg in enumerate(messages)
+    }
+
+def _active_branch(
+    messages: List[Dict[str, str]],
+    leaf_id: Optional[str] = None
+) -> List[Dict[str, str]]:
+    if not messages:
+        return []
+
+    by_id: Dict[str, Dict[str, str]] = {msg["id"]: msg for msg in messages}
+    parents: Dict[str, Union[str, None]] = _build_tree_index(messages)
+
+    if leaf_id not in by_id:
+        leaf_id = messages[-1]["id"]
+
+    # Walk up from the leaf to the root, the visited set protects against cycles
+    branch: List[Dict[str, str]] = []
+    visited: Set[str] = set()
+    current: Union[str, None] = leaf_id
+    while current in by_id and current not in visited:
+        visited.add(current)
+        branch.append(by_id[current])
+        current = parents[current]
+
+    branch.reverse()
+    return branch
+
+def retrieve_messages(
+    conversation_id: str,
+    leaf_id: Optional[str] = None
+) -> Union[List[Dict[str, str]], None]:
+    """
+    Synchronizes the cached messages of a conversation with `r2r`.
+    Only the messages after the ones the session already holds are requested.
+
+    Returns only the branch from the root to `leaf_id` (the most recent message by default),
+    so messages of abandoned branches are neither rendered nor part of the prompt.
+    """
+    cached: List[Dict[str, str]] = _conversation_cache().get(conversation_id, [])
+
+    response: requests.Response = send_authorized(
+        lambda token: requests.get(
+            url=f"http://r2r:7272/v3/conversations/{conversation_id}",
+            headers={
+                "Authorization": f"Bearer {token}"
+            },
+            params={
+                "offset": len(cached)
+            },
+            timeout=5
+        )
     )
 
     if response.status_code != 200:
+        _conversation_cache().pop(conversation_id, None)
         st.error(f"Failed to fetch messages: {response.status_code} - {response.text}")
         return None
 
-    conversation: List[Dict] = response.json()['results']
-    messages: List[Dict[str, str]] = [
-        {
-            "id": obj["id"],
-            "role": obj["message"]["role"],
-            "content": obj["message"]["content"]
-        }
-        for obj in conversation
+    # Guards against servers, which ignore the offset and return the whole conversation
+    known_ids: Set[str] = {msg["id"] for msg in cached}
+    new_messages: List[Dict[str, str]] = [
+        _to_message(obj)
+        for obj in response.json()['results']
+        if obj["id"] not in known_ids
     ]
-    return messages
+
+    messages: List[Dict[str, str]] = cached + new_messages
+    _conversation_cache()[conversation_id] = messages
+    return _active_branch(messages, leaf_id)
 
 def check_conversation_exists() -> bool:
-    response: requests.Response = requests.get(
-        url=f"http://r2r:7272/v3/conversations/{st.session_state['conversation_id']}",
-        headers={
-            "Authorization": f"Bearer {st.session_state['bearer_token']}"
-        },
-        params={
-            "limit": 1000
-        },
-        timeout=5
+    if not st.session_state['conversation_id']:
+        return False
+
+    # Filtering the conversation list by id avoids downloading the messages
+    response: requests.Response = send_authorized(
+        lambda token: requests.get(
+            url="http://r2r:7272/v3/conversations",
+            headers={
+                "Authorization": f"Bearer {token}"
+            },
+            params={
+                "ids": [st.session_state['conversation_id']],
+                "limit": 1
+            },
+            timeout=5
+        )
     )
 
-    if response.status_code != 200:
+    if response.status_code != 200 or not response.json()['results']:
+        _conversation_cache().pop(st.session_state['conversation_id'], None)
         return False
 
     return True
 
 def create_conversation():
-    response: requests.Response = requests.post(
-        url="http://r2r:7272/v3/conversations",
-        headers={
-            "Authorization": f"Bearer {st.session_state['bearer_token']}"
-        },
-        timeout=5
+    response: requests.Response = send_authorized(
+        lambda token: requests.post(
+            url="http://r2r:7272/v3/conversations",
+            headers={
+                "Authorization": f"Bearer {token}"
+            },
+            timeout=5
+        )
     )
 
     if response.status_code != 200:
@@ -91,44 +179,65 @@ def create_conversation():
     st.session_state['conversation_id'] = response.json()['results']['id']
     st.session_state['messages'] = []
     st.session_state['parent_id'] = None
+    _conversation_cache()[st.session_state['conversation_id']] = []
 
 def set_new_prompt(prompt_name: str) -> bool:
-    response: requests.Response = requests.post(
-        url=f"http://r2r:7272/v3/prompts/{prompt_name}",
-        headers={
-            "Authorization": f"Bearer {st.session_state['bearer_token']}"
-        },
-        timeout=5
-    )
+    # Served from the process-wide registry, no request is sent if nothing changed
+    try:
+        prompt: Union[RegisteredPrompt, None] = prompt_registry().get(
+            prompt_name, st.session_state['bearer_token']
+        )
+    except requests.HTTPError:
+        return False
 
-    if response.status_code != 200:
+    if prompt is None or not prompt.is_rag_template:
         return False
 
     st.session_state['selected_prompt'] = prompt_name
-    st.session_state['prompt_template'] = response.json()['results']['template']
+    st.session_state['prompt_template'] = prompt.template
     return True
 
 def add_message(msg: Dict[str, str]):
-    response: requests.Response = requests.post(
-        url=f"http://r2r:7272/v3/conversations/{st.session_state['conversation_id']}/messages",
-        headers={
-            "Authorization": f"Bearer {st.session_state['bearer_token']}"
-        },
-        json={
-            "content": msg['content'],
-            "role": msg['role'],
-            # If this is the first message in the conversation => None/Null
-            "parent_id": st.session_state['parent_id'] 
-        },
-        timeout=5
+    response: requests.Response = send_authorized(
+        lambda token: requests.post(
+            url=f"http://r2r:7272/v3/conversations/{st.session_state['conversation_id']}/messages",
+            headers={
+                "Authorization": f"Bearer {token}"
+            },
+            json={
+                "content": msg['content'],
+                "role": msg['role'],
+                # If this is the first message in the conversation => None/Null
+                "parent_id": st.session_state['parent_id'],
+                # Also kept in the metadata, since it's returned when the conversation is fetched
+                "metadata": {
+                    "parent_id": st.session_state['parent_id']
+                }
+            },
+            timeout=5
+        )
     )
 
     if response.status_code != 200:
         st.error(f"Failed to add message: {response.status_code} - {response.text}")
         return
 
+    message_id: str = response.json()['results']['id']
+
+    # Keep the cache in sync, so that reloading the conversation only fetches newer messages
+    cached: Union[List[Dict[str, str]], None] = _conversation_cache().get(
+        st.session_state['conversation_id']
+    )
+    if cached is not None:
+        cached.append({
+            "id": message_id,
+            "parent_id": st.session_state['parent_id'],
+            "role": msg['role'],
+            "content": msg['content']
+        })
+
     # Set the parent id for next message to equal the id of the newly added one
-    st.session_state['parent_id'] = response.json()['results']['id']
+    st.session_state['parent_id'] = message_id
 
     # Finally, add to session state to be displayed
     if not st.session_state['messages']:
@@ -139,19 +248,30 @@ def add_message(msg: Dict[str, str]):
 def submit_query() -> str:
     query: str = st.session_state['messages'][-1]['content']
 
+    # Near-duplicates are dropped from the results, so more are requested to still fill the top k
+    exclude_duplicates: bool = st.session_state['exclude_duplicate_context']
+    limit: int = SEARCH_SETTINGS['limit'] * (2 if exclude_duplicates else 1)
+
     # 1. Request and retrieve the context
-    response: requests.Response = requests.post(
-        url="http://r2r:7272/v3/retrieval/search",
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {st.session_state['bearer_token']}"
-        },
-        json={
-            "query": query,
-            "search_settings": SEARCH_SETTINGS,
-            "search_mode": "custom"
-        },
-        timeout=60
+    response: requests.Response = send_authorized(
+        lambda token: requests.post(
+            url="http://r2r:7272/v3/retrieval/search",
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {token}"
+            },
+            json={
+                "query": query,
+                # Only the chunks of the current chunking configuration
+                "search_settings": {
+                    **SEARCH_SETTINGS,
+                    "limit": limit,
+                    "filters": collection_filter(st.session_state['collection_id'])
+                },
+                "search_mode": "custom"
+            },
+            timeout=60
+        )
     )
 
     if response.status_code != 200:
@@ -166,28 +286,39 @@ def submit_query() -> str:
         if chunk['text']:
             retrieved_chunks.append(chunk['text'])
 
+    if exclude_duplicates:
+        # The results are ordered by score, so the best scoring chunk of every group is kept
+        retrieved_chunks = [retrieved_chunks[i] for i in drop_near_duplicates(retrieved_chunks)]
+        retrieved_chunks = retrieved_chunks[:SEARCH_SETTINGS['limit']]
+
     # 2. Augment the user query with the context
     user_msg: str = st.session_state['prompt_template'].format(
         context="\n".join(retrieved_chunks),
         query=query
     )
 
-    messages: List[Dict] = st.session_state['messages'][:-1] # Exclude the query
+    # Exclude the query, the ids are only relevant for the client
+    messages: List[Dict] = [
+        {'role': msg['role'], 'content': msg['content']}
+        for msg in st.session_state['messages'][:-1]
+    ]
     messages.append({'role': 'user', 'content': user_msg})   # This will be the augmented prompt (query + context)
 
     # 3. Send a RAG request
-    response: requests.Response = requests.post(
-        url="http://r2r:7272/v3/retrieval/completion",
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {st.session_state['bearer_token']}"
-        },
-        json={
-            "messages": messages,
-            "generation_config": RAG_GENERATION_CONFIG,
-            "response_model": "MessageEvent",
-        },
-        timeout=600 # 10 minutes
+    response: requests.Response = send_authorized(
+        lambda token: requests.post(
+            url="http://r2r:7272/v3/retrieval/completion",
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {token}"
+            },
+            json={
+                "messages": messages,
+                "generation_config": RAG_GENERATION_CONFIG,
+                "response_model": "MessageEvent",
+            },
+            timeout=600 # 10 minutes
+        )
     )
 
     if response.status_code != 200:
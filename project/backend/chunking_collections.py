@@ -0,0 +1,191 @@
+# pylint: disable=C0114
+# pylint: disable=C0116
+# pylint: disable=C0301
+
+import time
+import uuid
+import threading
+from typing import Dict, List, Set, Tuple, Iterator, Union, Any, Final
+
+import requests
+
+# Kept free of streamlit, so that the evaluation notebooks derive the same document ids
+
+# Namespace of the document ids, see `scoped_document_id`
+DOCUMENT_NAMESPACE: Final[uuid.UUID] = uuid.uuid5(uuid.NAMESPACE_URL, "r2r-chunking-collections")
+
+# Every chunking configuration (chunk size, overlap) gets a collection of its own.
+# The same corpus can be ingested into several of them, switching the experiment is then
+# a matter of scoping the search to another collection instead of re-ingesting everything.
+
+COLLECTION_PREFIX: Final[str] = "chunking-"
+
+# Ids are looked up again after this long, so that a deleted (and recreated) collection is noticed
+COLLECTION_TTL_SECONDS: Final[int] = 300
+
+_cache_lock = threading.Lock()
+_collection_ids: Dict[Tuple[int, int], Tuple[str, float]] = {}
+
+def chunking_collection_name(chunk_size: int, chunk_overlap: int) -> str:
+    return f"{COLLECTION_PREFIX}{chunk_size}-{chunk_overlap}"
+
+def _iter_collections(bearer_token: str) -> Iterator[Dict[str, Any]]:
+    offset: int = 0
+    while True:
+        response: requests.Response = requests.get(
+            url="http://r2r:7272/v3/collections",
+            headers={
+                "Authorization": f"Bearer {bearer_token}"
+            },
+            params={
+                "offset": offset,
+                "limit": 100
+            },
+            timeout=10
+        )
+
+        if response.status_code != 200:
+            raise requests.HTTPError(
+                f"Failed to fetch collections: {response.status_code} - {response.text}",
+                response=response
+            )
+
+        page: List[Dict[str, Any]] = response.json()['results']
+        yield from page
+
+        if len(page) < 100:
+            return
+        offset += 100
+
+def _find_collection(name: str, bearer_token: str) -> Dict[str, Any]:
+    return next((collection for collection in _iter_collections(bearer_token) if collection['name'] == name), {})
+
+def ensure_chunking_collection(chunk_size: int, chunk_overlap: int, bearer_token: str) -> str:
+    """
+    Returns the id of the collection of the chunking configuration, creating it if needed.
+    The id is shared by all sessions for `COLLECTION_TTL_SECONDS`, see `forget_chunking_collections`.
+    Failed requests raise, so that an error never ends up in the cache.
+    """
+    key: Tuple[int, int] = (chunk_size, chunk_overlap)
+    with _cache_lock:
+        cached: Union[Tuple[str, float], None] = _collection_ids.get(key)
+    if cached is not None and time.monotonic() - cached[1] < COLLECTION_TTL_SECONDS:
+        return cached[0]
+
+    collection_id: str = _find_or_create_collection(chunk_size, chunk_overlap, bearer_token)
+    with _cache_lock:
+        _collection_ids[key] = (collection_id, time.monotonic())
+    return collection_id
+
+def forget_chunking_collections():
+    """
+    Drops the cached ids, e.g. after `r2r` answered with a 404 for one of them.
+    """
+    with _cache_lock:
+        _collection_ids.clear()
+
+def _find_or_create_collection(chunk_size: int, chunk_overlap: int, bearer_token: str) -> str:
+    name: str = chunking_collection_name(chunk_size, chunk_overlap)
+    collection: Dict[str, Any] = _find_collection(name, bearer_token)
+    if collection:
+        return collection['id']
+
+    response: requests.Response = requests.post(
+        url="http://r2r:7272/v3/collections",
+        headers={
+            "Authorization": f"Bearer {bearer_token}",
+            "Content-Type": "application/json"
+        },
+        json={
+            "name": name,
+            "description": f"Documents chunked with a chunk size of {chunk_size} and an overlap of {chunk_overlap}"
+        },
+        timeout=10
+    )
+
+    if response.status_code != 200:
+        raise requests.HTTPError(
+            f"Failed to create collection {name}: {response.status_code} - {response.text}",
+            response=response
+        )
+
+    return response.json()['results']['id']
+
+def unassigned_documents(bearer_token: str) -> List[Dict[str, Any]]:
+    """
+    Documents in none of the chunking collections, i.e. the ones ingested before there were any.
+    They're only part of the default collection, so the filtered search wouldn't find them.
+    Documents added to a collection since are members and aren't returned again.
+    """
+    chunking_ids: Set[str] = {
+        collection['id'] for collection in _iter_collections(bearer_token)
+        if collection['name'].startswith(COLLECTION_PREFIX)
+    }
+    return [
+        document for document in _iter_documents(bearer_token)
+        if not chunking_ids.intersection(document.get('collection_ids') or [])
+    ]
+
+def add_to_collection(collection_id: str, document_id: str, bearer_token: str):
+    # Also assigns the chunks of the document to the collection
+    response: requests.Response = requests.post(
+        url=f"http://r2r:7272/v3/collections/{collection_id}/documents/{document_id}",
+        headers={
+            "Authorization": f"Bearer {bearer_token}"
+        },
+        timeout=30
+    )
+
+    if response.status_code != 200:
+        raise requests.HTTPError(
+            f"Failed to add document {document_id} to collection {collection_id}: {response.status_code} - {response.text}",
+            response=response
+        )
+
+def _iter_documents(bearer_token: str) -> Iterator[Dict[str, Any]]:
+    offset: int = 0
+    while True:
+        response: requests.Response = requests.get(
+            url="http://r2r:7272/v3/documents",
+            headers={
+                "Authorization": f"Bearer {bearer_token}"
+            },
+            params={
+                "offset": offset,
+                "limit": 100
+            },
+            timeout=10
+        )
+
+        if response.status_code != 200:
+            raise requests.HTTPError(
+                f"Failed to fetch documents: {response.status_code} - {response.text}",
+                response=response
+            )
+
+        page: List[Dict[str, Any]] = response.json()['results']
+        yield from page
+
+        if len(page) < 100:
+            return
+        offset += 100
+
+def scoped_document_id(collection_id: str, filename: str) -> str:
+    """
+    `r2r` derives the id of a document from its name, so the same file couldn't be part of
+    two collections. The id is derived from the collection and the name instead.
+    """
+    return str(uuid.uuid5(DOCUMENT_NAMESPACE, f"{collection_id}/{filename}"))
+
+def collection_filter(collection_id: str) -> Dict[str, Any]:
+    """
+    Search filter restricting the results to the chunks of a collection.
+    """
+    return {
+        "collection_ids": {
+            "$overlap": [collection_id]
+        }
+    }
+
+def in_collection(document: Dict[str, Any], collection_id: str) -> bool:
+    return collection_id in (document.get('collection_ids') or [])
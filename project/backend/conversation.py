@@ -7,68 +7,179 @@
 # pylint: disable=W0612
 # pylint: disable=W0718
 
-from typing import List, Dict
+from typing import List, Dict, Tuple, Union, Final
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
+import pandas as pd
 import streamlit as st
 
-def list_conversations():
+CONVERSATIONS_PAGE_SIZE: Final[int] = 50
+
+# Upper bound of DELETE requests in flight when removing several conversations at once
+MAX_CONCURRENT_DELETES: Final[int] = 8
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _fetch_conversations_page(
+    offset: int,
+    limit: int,
+    bearer_token: str
+) -> Tuple[List[Dict], int]:
     response: requests.Response = requests.get(
         url="http://r2r:7272/v3/conversations",
         headers={
-            "Authorization": f"Bearer {st.session_state['bearer_token']}"
+            "Authorization": f"Bearer {bearer_token}"
         },
         params={
-            "offset": 0,
-            "limit": 1000
+            "offset": offset,
+            "limit": limit
         },
         timeout=5
     )
 
     if response.status_code != 200:
-        st.error(f"Error checking conversations: {response.text}")
+        raise requests.HTTPError(
+            f"Error checking conversations: {response.text}",
+            response=response
+        )
+
+    body: Dict = response.json()
+    return body["results"], body.get("total_entries", len(body["results"]))
+
+def _change_page(step: int):
+    st.session_state['conversations_page'] += step
+
+def list_conversations():
+    page: int = st.session_state['conversations_page']
+
+    try:
+        conversations, total = _fetch_conversations_page(
+            offset=page * CONVERSATIONS_PAGE_SIZE,
+            limit=CONVERSATIONS_PAGE_SIZE,
+            bearer_token=st.session_state['bearer_token']
+        )
+    except requests.HTTPError as e:
+        st.error(str(e))
         return
 
-    conversations: List[Dict] = response.json()["results"]
+    if not conversations and page > 0:
+        # The page might not exist anymore after deleting conversations
+        st.session_state['conversations_page'] = 0
+        st.rerun()
 
     if not conversations:
         st.info("No conversations found.")
         return
 
-    for i, conversation in enumerate(conversations, 1):
-        with st.expander(
-            label=f"Conversation {i}: {conversation['id']}",
-            expanded=False
-        ):
-            st.markdown(f"""
-    **ID**: `{conversation['id']}`  
-    **Created at**: `{conversation['created_at']}`  
-            """, unsafe_allow_html=False)
-
-            with st.popover(label="Delete conversation", icon="🗑️"):
-                delete_conv_btn = st.button(
-                    label="Confirm",
-                    key=f"delete_btn_{conversation['id']}",
-                    on_click=delete_conversation,
-                    args=(conversation['id'], )
-                )
-        
-    st.info("You've reached the end of the conversations list.")
-
-def delete_conversation(conversation_id: str):
-    response: requests.Response = requests.delete(
-        url=f"http://r2r:7272/v3/conversations/{conversation_id}",
-        headers={
-            "Authorization": f"Bearer {st.session_state['bearer_token']}"
-        },
-        timeout=5
+    pages: int = max((total + CONVERSATIONS_PAGE_SIZE - 1) // CONVERSATIONS_PAGE_SIZE, 1)
+
+    table: pd.DataFrame = pd.DataFrame(
+        [
+            {
+                "ID": conversation['id'],
+                "Name": conversation.get('name'),
+                "Created at": conversation['created_at']
+            }
+            for conversation in conversations
+        ]
+    )
+
+    event = st.dataframe(
+        data=table,
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="multi-row",
+        key=f"conversations_table_{page}"
     )
+    selected_ids: List[str] = table.iloc[event.selection.rows]["ID"].tolist()
+
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        st.button(
+            label="Previous",
+            key="conv_prev_page_btn",
+            disabled=page == 0,
+            on_click=_change_page,
+            args=(-1, )
+        )
+    with col_page:
+        st.markdown(f"Page `{page + 1}` of `{pages}` ({total} conversations)")
+    with col_next:
+        st.button(
+            label="Next",
+            key="conv_next_page_btn",
+            disabled=page + 1 >= pages,
+            on_click=_change_page,
+            args=(1, )
+        )
+
+    with st.popover(
+        label=f"Delete selected ({len(selected_ids)})",
+        icon="🗑️",
+        disabled=not selected_ids
+    ):
+        delete_conv_btn = st.button(
+            label="Confirm",
+            key="delete_selected_conv_btn",
+            on_click=delete_conversations,
+            args=(selected_ids, )
+        )
+
+def _send_delete(conversation_id: str, bearer_token: str) -> Union[str, None]:
+    """
+    Runs in a worker thread, so it must not touch the session state or render anything.
+    Returns the error or None on success.
+    """
+    try:
+        response: requests.Response = requests.delete(
+            url=f"http://r2r:7272/v3/conversations/{conversation_id}",
+            headers={
+                "Authorization": f"Bearer {bearer_token}"
+            },
+            timeout=5
+        )
+    except requests.RequestException as e:
+        return str(e)
 
     if response.status_code != 200:
-        st.error(f"Failed to delete conversation: {response.status_code} - {response.text}")
-        return        
+        return f"{response.status_code} - {response.text}"
+
+    return None
+
+def _forget_conversations(conversation_ids: List[str]):
+    refresh_conversations()
+    for conversation_id in conversation_ids:
+        st.session_state['conversation_cache'].pop(conversation_id, None)
 
-    st.success(f"Deleted conversation: {conversation_id}")
+def refresh_conversations():
+    _fetch_conversations_page.clear()
+
+def delete_conversations(conversation_ids: List[str]):
+    if not conversation_ids:
+        return
+
+    bearer_token: str = st.session_state['bearer_token']
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_DELETES, len(conversation_ids))) as pool:
+        errors: List[Union[str, None]] = list(
+            pool.map(lambda conv_id: _send_delete(conv_id, bearer_token), conversation_ids)
+        )
+
+    _forget_conversations(conversation_ids)
+
+    failed: List[str] = [
+        f"`{conv_id}`: {error}"
+        for conv_id, error in zip(conversation_ids, errors)
+        if error is not None
+    ]
+    deleted: int = len(conversation_ids) - len(failed)
+
+    if failed:
+        st.error(
+            f"Deleted {deleted} of {len(conversation_ids)} conversations. Failed:  \n" + "  \n".join(failed)
+        )
+    else:
+        st.success(f"Deleted {deleted} conversations")
 
 def fetch_messages(conversation_id: str):
     response: requests.Response = requests.get(
@@ -0,0 +1,363 @@
+"""
+Streaming export and import of `r2r` conversations.
+
+Conversations are paged through `/v3/conversations`, the messages of each page are fetched
+with bounded concurrency and written out before the next page is requested.
+Memory therefore stays bounded by the page size, regardless of the number of conversations.
+The exports can be replayed into a fresh `r2r` instance, e.g. as input for load tests.
+
+Usage (from the `project` folder):
+    python -m backend.conversation_archive export conversations.jsonl
+    python -m backend.conversation_archive import conversations.jsonl --base-url http://localhost:7272
+
+Parquet (`.parquet`) requires `pyarrow`, JSONL works without additional dependencies.
+"""
+
+# pylint: disable=C0301
+
+import sys
+import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Set, Iterator, Iterable, Tuple, Union, Final, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from backend.system import login
+
+PAGE_SIZE: Final[int] = 100
+MAX_CONCURRENT_REQUESTS: Final[int] = 8
+
+# One row per message, conversations are written contiguously in their original order
+COLUMNS: Final[List[str]] = [
+    "conversation_id",
+    "conversation_name",
+    "conversation_created_at",
+    "message_id",
+    "parent_id",
+    "role",
+    "content",
+    "created_at"
+]
+
+def new_session(max_connections: int = MAX_CONCURRENT_REQUESTS) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def iter_conversation_pages(
+    session: requests.Session,
+    base_url: str,
+    token: str,
+    page_size: int = PAGE_SIZE
+) -> Iterator[List[Dict[str, Any]]]:
+    offset: int = 0
+    while True:
+        response: requests.Response = session.get(
+            url=f"{base_url}/v3/conversations",
+            headers={
+                "Authorization": f"Bearer {token}"
+            },
+            params={
+                "offset": offset,
+                "limit": page_size
+            },
+            timeout=30
+        )
+
+        if response.status_code != 200:
+            raise requests.HTTPError(
+                f"Failed to list conversations: {response.status_code} - {response.text}",
+                response=response
+            )
+
+        page: List[Dict[str, Any]] = response.json()['results']
+        if not page:
+            return
+
+        yield page
+
+        if len(page) < page_size:
+            return
+        offset += page_size
+
+def fetch_conversation_rows(
+    session: requests.Session,
+    base_url: str,
+    token: str,
+    conversation: Dict[str, Any],
+    page_size: int = PAGE_SIZE
+) -> List[Dict[str, Any]]:
+    """
+    Pages through the messages of the conversation, `r2r` returns only a limited number per request.
+    """
+    messages: List[Dict[str, Any]] = []
+    seen: Set[str] = set()
+    offset: int = 0
+    while True:
+        response: requests.Response = session.get(
+            url=f"{base_url}/v3/conversations/{conversation['id']}",
+            headers={
+                "Authorization": f"Bearer {token}"
+            },
+            params={
+                "offset": offset,
+                "limit": page_size
+            },
+            timeout=30
+        )
+
+        if response.status_code != 200:
+            raise requests.HTTPError(
+                f"Failed to fetch conversation {conversation['id']}: {response.status_code} - {response.text}",
+                response=response
+            )
+
+        page: List[Dict[str, Any]] = response.json()['results']
+        # Guards against servers, which ignore the offset and return the whole conversation
+        new: List[Dict[str, Any]] = [obj for obj in page if obj['id'] not in seen]
+        messages.extend(new)
+        seen.update(obj['id'] for obj in new)
+
+        if len(page) < page_size or not new:
+            break
+        offset += page_size
+
+    rows: List[Dict[str, Any]] = []
+    for obj in messages:
+        metadata: Dict[str, Any] = obj.get("metadata") or {}
+        rows.append({
+            "conversation_id": conversation['id'],
+            "conversation_name": conversation.get('name'),
+            "conversation_created_at": conversation.get('created_at'),
+            "message_id": obj['id'],
+            "parent_id": obj.get("parent_id", metadata.get("parent_id")),
+            "role": obj['message']['role'],
+            "content": obj['message']['content'],
+            "created_at": obj.get("created_at", metadata.get("timestamp"))
+        })
+    return rows
+
+def iter_export_batches(
+    base_url: str,
+    token: str,
+    page_size: int = PAGE_SIZE,
+    max_concurrency: int = MAX_CONCURRENT_REQUESTS
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yields the message rows of one page of conversations at a time.
+    """
+    session: requests.Session = new_session(max_concurrency)
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        for page in iter_conversation_pages(session, base_url, token, page_size):
+            batch: List[Dict[str, Any]] = []
+            # `map` keeps the order of the conversations
+            for rows in pool.map(
+                lambda conv: fetch_conversation_rows(session, base_url, token, conv),
+                page
+            ):
+                batch.extend(rows)
+            yield batch
+
+def _parquet():
+    try:
+        import pyarrow as pa # pylint: disable=C0415
+        import pyarrow.parquet as pq # pylint: disable=C0415
+    except ImportError as e:
+        raise ValueError("Parquet files require `pyarrow`: pip install pyarrow") from e
+    return pa, pq
+
+def _parquet_schema(pa):
+    return pa.schema([(column, pa.string()) for column in COLUMNS])
+
+def write_export(batches: Iterable[List[Dict[str, Any]]], path: str) -> Tuple[int, int]:
+    """
+    Writes the batches to JSONL or Parquet depending on the file extension.
+    Returns the number of conversations and messages written.
+    """
+    conversations: int = 0
+    messages: int = 0
+
+    if path.endswith(".parquet"):
+        pa, pq = _parquet()
+        schema = _parquet_schema(pa)
+        with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+            for batch in batches:
+                if not batch:
+                    continue
+                columns: Dict[str, List[Union[str, None]]] = {
+                    column: [None if row[column] is None else str(row[column]) for row in batch]
+                    for column in COLUMNS
+                }
+                writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+                conversations += len({row["conversation_id"] for row in batch})
+                messages += len(batch)
+        return conversations, messages
+
+    with open(file=path, mode="w", encoding="utf-8") as f:
+        for batch in batches:
+            for row in batch:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            conversations += len({row["conversation_id"] for row in batch})
+            messages += len(batch)
+    return conversations, messages
+
+def iter_rows(path: str) -> Iterator[Dict[str, Any]]:
+    if path.endswith(".parquet"):
+        _, pq = _parquet()
+        parquet_file = pq.ParquetFile(path)
+        for record_batch in parquet_file.iter_batches(batch_size=PAGE_SIZE * 10):
+            yield from record_batch.to_pylist()
+        return
+
+    with open(file=path, mode="r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def iter_conversations(rows: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Groups consecutive rows by conversation. Only one conversation is held in memory.
+    """
+    current: List[Dict[str, Any]] = []
+    for row in rows:
+        if current and row["conversation_id"] != current[0]["conversation_id"]:
+            yield current
+            current = []
+        current.append(row)
+
+    if current:
+        yield current
+
+def import_conversation(
+    session: requests.Session,
+    base_url: str,
+    token: str,
+    rows: List[Dict[str, Any]]
+) -> int:
+    """
+    Re-creates a single conversation and its messages.
+    The parent ids are remapped to the ids assigned by the target instance.
+    Returns the number of imported messages.
+    """
+    headers: Dict[str, str] = {
+        "Authorization": f"Bearer {token}"
+    }
+
+    response: requests.Response = session.post(
+        url=f"{base_url}/v3/conversations",
+        headers=headers,
+        json={"name": rows[0].get("conversation_name")} if rows[0].get("conversation_name") else None,
+        timeout=30
+    )
+
+    if response.status_code != 200:
+        raise requests.HTTPError(
+            f"Failed to create conversation: {response.status_code} - {response.text}",
+            response=response
+        )
+
+    conversation_id: str = response.json()['results']['id']
+    new_ids: Dict[str, str] = {}
+    previous_id: Union[str, None] = None
+
+    for row in rows:
+        # Rows exported without a parent are linear conversations
+        parent_id: Union[str, None] = previous_id
+        if row.get("parent_id"):
+            parent_id = new_ids.get(row["parent_id"])
+            if parent_id is None:
+                # Detaching the message would drop it (and its replies) from the rendered branch
+                print(
+                    f"Warning: parent {row['parent_id']} of message {row['message_id']} isn't part of "
+                    f"conversation {row['conversation_id']}, it's attached to the previous message instead",
+                    file=sys.stderr
+                )
+                parent_id = previous_id
+
+        response = session.post(
+            url=f"{base_url}/v3/conversations/{conversation_id}/messages",
+            headers=headers,
+            json={
+                "content": row["content"],
+                "role": row["role"],
+                "parent_id": parent_id,
+                "metadata": {
+                    "parent_id": parent_id
+                }
+            },
+            timeout=30
+        )
+
+        if response.status_code != 200:
+            raise requests.HTTPError(
+                f"Failed to add message: {response.status_code} - {response.text}",
+                response=response
+            )
+
+        previous_id = response.json()['results']['id']
+        new_ids[row["message_id"]] = previous_id
+
+    return len(rows)
+
+def run_import(
+    path: str,
+    base_url: str,
+    token: str,
+    max_concurrency: int = MAX_CONCURRENT_REQUESTS
+) -> Tuple[int, int]:
+    """
+    Messages of one conversation are added sequentially to preserve the parent links,
+    while up to `max_concurrency` conversations are imported at the same time.
+    """
+    session: requests.Session = new_session(max_concurrency)
+    conversations: int = 0
+    messages: int = 0
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        pending = []
+        for rows in iter_conversations(iter_rows(path)):
+            pending.append(pool.submit(import_conversation, session, base_url, token, rows))
+
+            # Bound the number of conversations held in memory
+            if len(pending) >= max_concurrency * 2:
+                messages += pending.pop(0).result()
+                conversations += 1
+
+        for future in pending:
+            messages += future.result()
+            conversations += 1
+
+    return conversations, messages
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Export or import r2r conversations.")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path", help="Target (export) or source (import) file, `.jsonl` or `.parquet`")
+    parser.add_argument("--base-url", default="http://localhost:7272")
+    parser.add_argument("--username", default="admin@example.com")
+    parser.add_argument("--password", default="change_me_immediately")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_REQUESTS)
+    args = parser.parse_args(argv)
+
+    token: str = login(args.username, args.password, args.base_url)
+
+    if args.command == "export":
+        conversations, messages = write_export(
+            iter_export_batches(args.base_url, token, max_concurrency=args.concurrency),
+            args.path
+        )
+        print(f"Exported {conversations} conversations ({messages} messages) to {args.path}")
+    else:
+        conversations, messages = run_import(
+            args.path, args.base_url, token, max_concurrency=args.concurrency
+        )
+        print(f"Imported {conversations} conversations ({messages} messages) from {args.path}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,294 @@
+# pylint: disable=C0114
+# pylint: disable=C0116
+# pylint: disable=C0301
+# pylint: disable=W0718
+
+import json
+import uuid
+import hashlib
+import dataclasses
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple, Union, Final, Any
+
+import requests
+import streamlit as st
+
+from backend.provisioning import run_bounded
+from backend.partition_cache import PartitionCache, request_config, partition_remote
+from backend.chunking_collections import DOCUMENT_NAMESPACE
+
+CHUNKS_PAGE_SIZE: Final[int] = 1000
+MAX_CONCURRENT_CHUNK_REQUESTS: Final[int] = 8
+
+# Metadata key of the documents holding the chunks an update added to a document
+EXTENDS_DOCUMENT_KEY: Final[str] = "extends_document_id"
+
+@dataclasses.dataclass
+class ChunkDiff:
+    unchanged: int
+    # (id of an outdated chunk, new text), the chunk is rewritten in place
+    updates: List[Tuple[str, str]]
+    # Outdated chunks without a replacement
+    deletes: List[str]
+    # New texts without an outdated chunk to take over
+    additions: List[str]
+
+def chunk_hash(text: str) -> str:
+    # Whitespace differences don't change the embedding in a meaningful way
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+def diff_chunks(existing: List[Dict[str, str]], new_texts: List[str]) -> ChunkDiff:
+    """
+    Matches the new chunk texts against the existing chunks by hash.
+    Every text matched by an existing chunk keeps that chunk (and its embedding).
+    The remaining texts replace the remaining chunks in document order, the surplus on either side
+    is added or deleted.
+    """
+    available: Dict[str, List[str]] = defaultdict(list)
+    for chunk in existing:
+        available[chunk_hash(chunk['text'])].append(chunk['id'])
+
+    unchanged: int = 0
+    matched: Set[str] = set()
+    unmatched: List[str] = []
+    for text in new_texts:
+        ids: List[str] = available.get(chunk_hash(text), [])
+        if ids:
+            matched.add(ids.pop(0))
+            unchanged += 1
+        else:
+            unmatched.append(text)
+
+    outdated: List[str] = [chunk['id'] for chunk in existing if chunk['id'] not in matched]
+    pairs: int = min(len(outdated), len(unmatched))
+    return ChunkDiff(
+        unchanged=unchanged,
+        updates=list(zip(outdated[:pairs], unmatched[:pairs])),
+        deletes=outdated[pairs:],
+        additions=unmatched[pairs:]
+    )
+
+def partition_to_chunks(content: bytes, filename: str, ingestion_config: Dict[str, Any]) -> List[str]:
+    """
+    Partitions and chunks the document with the `unstructured` service and the settings `r2r` uses.
+    Results are cached by content and config, so unchanged versions are never partitioned twice.
+    """
+    texts, _ = PartitionCache().chunks(content, filename, request_config(ingestion_config), partition_remote)
+    return texts
+
+def _headers(bearer_token: str) -> Dict[str, str]:
+    return {
+        "Authorization": f"Bearer {bearer_token}"
+    }
+
+def fetch_all_chunks(document_id: str, bearer_token: str) -> List[Dict[str, str]]:
+    chunks: List[Dict[str, str]] = []
+    offset: int = 0
+    while True:
+        response: requests.Response = requests.get(
+            url=f"http://r2r:7272/v3/documents/{document_id}/chunks",
+            headers=_headers(bearer_token),
+            params={
+                "offset": offset,
+                "limit": CHUNKS_PAGE_SIZE
+            },
+            timeout=30
+        )
+
+        if response.status_code != 200:
+            raise requests.HTTPError(
+                f"Failed to fetch chunks: {response.status_code} - {response.text}",
+                response=response
+            )
+
+        page: List[Dict[str, Any]] = response.json()['results']
+        chunks.extend({"id": chunk['id'], "text": chunk['text']} for chunk in page)
+        if len(page) < CHUNKS_PAGE_SIZE:
+            return chunks
+        offset += CHUNKS_PAGE_SIZE
+
+def extension_document_id(document_id: str) -> str:
+    # Every document has at most one extension, updates replace it
+    return str(uuid.uuid5(DOCUMENT_NAMESPACE, f"{document_id}/additions"))
+
+def _fetch_extension_chunks(document_id: str, bearer_token: str) -> List[Dict[str, str]]:
+    """
+    Chunks updates added to `document_id`, empty if it has no extension.
+    """
+    try:
+        return fetch_all_chunks(extension_document_id(document_id), bearer_token)
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            return []
+        raise
+
+def _send_chunk_update(item: Tuple[str, str], bearer_token: str) -> Union[str, None]:
+    """
+    Runs in a worker thread. Rewrites the text of a chunk, `r2r` re-embeds only this chunk.
+    """
+    chunk_id, text = item
+    try:
+        response: requests.Response = requests.post(
+            url=f"http://r2r:7272/v3/chunks/{chunk_id}",
+            headers=_headers(bearer_token),
+            json={
+                "id": chunk_id,
+                "text": text
+            },
+            timeout=60
+        )
+    except requests.RequestException as e:
+        return str(e)
+
+    if response.status_code != 200:
+        return f"Failed to update chunk {chunk_id}: {response.status_code} - {response.text}"
+    return None
+
+def _send_chunk_delete(chunk_id: str, bearer_token: str) -> Union[str, None]:
+    """
+    Runs in a worker thread.
+    """
+    try:
+        response: requests.Response = requests.delete(
+            url=f"http://r2r:7272/v3/chunks/{chunk_id}",
+            headers=_headers(bearer_token),
+            timeout=30
+        )
+    except requests.RequestException as e:
+        return str(e)
+
+    if response.status_code != 200:
+        return f"Failed to delete chunk {chunk_id}: {response.status_code} - {response.text}"
+    return None
+
+def delete_extension(document_id: str, bearer_token: str):
+    """
+    Deletes the document holding the chunks updates added to `document_id`, if there is one.
+    Deleting a document has to delete it too, otherwise its chunks are still retrieved.
+    """
+    extension_id: str = extension_document_id(document_id)
+    response: requests.Response = requests.delete(
+        url=f"http://r2r:7272/v3/documents/{extension_id}",
+        headers=_headers(bearer_token),
+        timeout=30
+    )
+
+    if response.status_code not in (200, 404):
+        raise requests.HTTPError(
+            f"Failed to delete document {extension_id}: {response.status_code} - {response.text}",
+            response=response
+        )
+
+def _add_chunks(document: Dict[str, Any], texts: List[str], bearer_token: str):
+    """
+    `r2r` can't append chunks to an existing document, so the additions go into a document
+    of its own, linked to the updated one through its metadata. An existing extension is
+    replaced, `texts` then has to include the chunks it keeps.
+    """
+    delete_extension(document['id'], bearer_token)
+
+    response: requests.Response = requests.post(
+        url="http://r2r:7272/v3/documents",
+        headers=_headers(bearer_token),
+        data={
+            "id": extension_document_id(document['id']),
+            "chunks": json.dumps(texts),
+            "collection_ids": json.dumps(document.get('collection_ids') or []),
+            "metadata": json.dumps({
+                # A title of its own, so it's never mistaken for the updated document
+                "title": f"{document['title']} (additions)",
+                EXTENDS_DOCUMENT_KEY: document['id']
+            })
+        },
+        timeout=3600
+    )
+
+    if response.status_code != 202:
+        raise requests.HTTPError(
+            f"Failed to add chunks: {response.status_code} - {response.text}",
+            response=response
+        )
+
+def _fold_into_extension(diff: ChunkDiff, extension_chunks: List[Dict[str, str]]) -> Tuple[ChunkDiff, List[str]]:
+    """
+    Removes the updates and deletes of the extension's chunks from the diff.
+    Returns the remaining diff and the texts the rebuilt extension keeps, in order.
+    """
+    updated: Dict[str, str] = dict(diff.updates)
+    deleted: Set[str] = set(diff.deletes)
+    extension_ids: Set[str] = {chunk['id'] for chunk in extension_chunks}
+
+    kept: List[str] = [
+        updated.get(chunk['id'], chunk['text'])
+        for chunk in extension_chunks
+        if chunk['id'] not in deleted
+    ]
+    return ChunkDiff(
+        unchanged=diff.unchanged,
+        updates=[(chunk_id, text) for chunk_id, text in diff.updates if chunk_id not in extension_ids],
+        deletes=[chunk_id for chunk_id in diff.deletes if chunk_id not in extension_ids],
+        additions=diff.additions
+    ), kept
+
+def update_document(
+    document: Dict[str, Any],
+    content: bytes,
+    filename: str,
+    ingestion_config: Dict[str, Any]
+):
+    """
+    Brings an ingested document up to date with a new version of its file.
+    Only chunks whose text changed are re-embedded, unchanged chunks are left as they are.
+    """
+    bearer_token: str = st.session_state['bearer_token']
+    try:
+        with st.spinner(text="Partitioning the new version...", show_time=True):
+            new_texts: List[str] = partition_to_chunks(content, filename, ingestion_config)
+
+        existing: List[Dict[str, str]] = fetch_all_chunks(document['id'], bearer_token)
+        extension_chunks: List[Dict[str, str]] = _fetch_extension_chunks(document['id'], bearer_token)
+        existing.extend(extension_chunks)
+    except requests.HTTPError as e:
+        st.error(str(e))
+        return
+    except requests.RequestException as e:
+        st.error(f"Failed to partition {filename}: {str(e)}")
+        return
+
+    diff: ChunkDiff = diff_chunks(existing, new_texts)
+    if not (diff.updates or diff.deletes or diff.additions):
+        st.info(f"No changes, all {diff.unchanged} chunks are up to date.")
+        return
+
+    extension_texts: List[str] = []
+    if diff.additions and extension_chunks:
+        # The extension is rebuilt with the additions, so its own chunks aren't touched one by one
+        diff, extension_texts = _fold_into_extension(diff, extension_chunks)
+
+    with st.spinner(text="Updating chunks...", show_time=True):
+        errors: List[str] = [
+            error for error in run_bounded(
+                lambda item: _send_chunk_update(item, bearer_token),
+                diff.updates,
+                MAX_CONCURRENT_CHUNK_REQUESTS
+            ) + run_bounded(
+                lambda chunk_id: _send_chunk_delete(chunk_id, bearer_token),
+                diff.deletes,
+                MAX_CONCURRENT_CHUNK_REQUESTS
+            )
+            if error
+        ]
+
+        if diff.additions:
+            try:
+                _add_chunks(document, extension_texts + diff.additions, bearer_token)
+            except requests.HTTPError as e:
+                errors.append(str(e))
+
+    for error in errors:
+        st.error(error)
+
+    st.success(
+        f"{diff.unchanged} chunks unchanged, {len(diff.updates)} rewritten, "
+        f"{len(diff.deletes)} deleted, {len(diff.additions)} added."
+    )
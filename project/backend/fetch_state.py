@@ -0,0 +1,83 @@
+# pylint: disable=C0114
+# pylint: disable=C0116
+# pylint: disable=C0301
+
+import os
+import time
+import sqlite3
+import hashlib
+import dataclasses
+from typing import Dict, List, Iterable, Union, Final
+
+FETCH_STATE_DB_PATH: Final[str] = os.getenv("FETCH_STATE_DB", "fetch_state.sqlite3")
+
+@dataclasses.dataclass
+class FetchState:
+    """
+    What is known about a scraped page: the validators of its last response,
+    the hash of the ingested content and the id of the resulting document.
+    """
+    url_key: str
+    url: str
+    etag: Union[str, None] = None
+    last_modified: Union[str, None] = None
+    content_hash: Union[str, None] = None
+    document_id: Union[str, None] = None
+    checked_at: float = 0.0
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(FETCH_STATE_DB_PATH, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS fetch_state (
+            url_key TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            etag TEXT,
+            last_modified TEXT,
+            content_hash TEXT,
+            document_id TEXT,
+            checked_at REAL NOT NULL
+        )
+    """)
+    return conn
+
+def load_fetch_states(url_keys: Iterable[str]) -> Dict[str, FetchState]:
+    keys: List[str] = list(url_keys)
+    states: Dict[str, FetchState] = {}
+    conn: sqlite3.Connection = _connect()
+    try:
+        # SQLite limits the number of variables per statement
+        for start in range(0, len(keys), 500):
+            batch: List[str] = keys[start:start + 500]
+            rows = conn.execute(
+                f"SELECT * FROM fetch_state WHERE url_key IN ({', '.join('?' * len(batch))})",
+                batch
+            ).fetchall()
+            for row in rows:
+                states[row[0]] = FetchState(*row)
+    finally:
+        conn.close()
+    return states
+
+def save_fetch_state(state: FetchState):
+    state.checked_at = time.time()
+    conn: sqlite3.Connection = _connect()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO fetch_state VALUES (?, ?, ?, ?, ?, ?, ?)",
+                dataclasses.astuple(state)
+            )
+    finally:
+        conn.close()
@@ -5,16 +5,20 @@
 # pylint: disable=W0718
 # pylint: disable=R1732
 
-import tempfile
+import time
 import dataclasses
-from pathlib import Path
-from typing import Dict, Union, List, Any
+from typing import Dict, Union, List, Set, Tuple, Final, Any
 
-import yaml
 import requests
 import streamlit as st
 from streamlit.runtime.uploaded_file_manager import UploadedFile
 
+from backend.provisioning import load_yaml_items, run_bounded, show_status_table
+from backend.index_build import track_index_build
+
+# Concurrent builds on the same table compete for it, so keep this low
+MAX_CONCURRENT_CREATES: Final[int] = 2
+
 @dataclasses.dataclass
 class Index:
     name: str
@@ -81,26 +85,104 @@ def delete_index(name: str):
 
     st.success(response.json()['results']['message'])
 
-def create_index(file: UploadedFile):
-    # Save uploaded file temporarily so as to read the data into dict
-    temp_file = tempfile.NamedTemporaryFile(delete=True, suffix=".yaml")
-    temp_file.write(file.getbuffer())
-    temp_file.flush()
+def _fetch_index_names(bearer_token: str) -> Set[str]:
+    response: requests.Response = requests.get(
+        url="http://r2r:7272/v3/indices",
+        headers={
+            "Authorization": f"Bearer {bearer_token}"
+        },
+        timeout=5
+    )
+
+    if response.status_code != 200:
+        raise requests.HTTPError(
+            f"Failed to fetch indices: {response.status_code} - {response.text}",
+            response=response
+        )
+
+    return {obj['index']['name'] for obj in response.json()['results'].get('indices', [])}
 
+def create_index(file: UploadedFile, dry_run: bool = False):
+    """
+    Creates every index defined in the uploaded YAML file.
+    All definitions are validated first, nothing is created if any of them is invalid.
+    With `dry_run` only the validation takes place.
+    """
     try:
-        index: Index = _load_index_config_from_yaml(temp_file.name)
+        items: List[Tuple[str, Any]] = load_yaml_items(file)
+        existing: Set[str] = _fetch_index_names(st.session_state['bearer_token'])
+    except ValueError as ve:
+        st.error(f"Error in YAML file structure: {str(ve)}")
+        return
+    except requests.HTTPError as e:
+        st.error(str(e))
+        return
 
-        idx_config: Dict[str, Union[str, bool]] = _construct_index_config(
-            index_method=index.method,
-            index_name=index.name,
-            index_measure=index.measure,
-            index_arguments=index.arguments
-        )
+    configs: List[Dict[str, Union[str, bool]]] = []
+    rows: List[Dict[str, str]] = []
+    for name, definition in items:
+        try:
+            index: Index = _parse_index(name, definition)
+            idx_config: Dict[str, Union[str, bool]] = _construct_index_config(
+                index_method=index.method,
+                index_name=index.name,
+                index_measure=index.measure,
+                index_arguments=index.arguments
+            )
+        except ValueError as ve:
+            rows.append({"Name": str(name), "Status": "invalid", "Detail": str(ve)})
+            continue
+
+        if index.name in existing:
+            rows.append({"Name": index.name, "Status": "invalid", "Detail": "Already exists"})
+            continue
+
+        rows.append({"Name": index.name, "Status": "valid", "Detail": f"{index.method}, {index.measure}"})
+        configs.append(idx_config)
+
+    if dry_run or len(configs) != len(items):
+        show_status_table(rows)
+        if len(configs) != len(items):
+            st.error("Nothing was created, fix the invalid indices first.")
+        else:
+            st.success(f"All {len(configs)} indices are valid.")
+        return
+
+    bearer_token: str = st.session_state['bearer_token']
+    started_at: float = time.time()
+    results: List[Tuple[str, str]] = run_bounded(
+        lambda idx_config: _send_create_index(idx_config, bearer_token),
+        configs,
+        MAX_CONCURRENT_CREATES
+    )
 
+    for row, idx_config, (status, detail) in zip(rows, configs, results):
+        row["Status"] = status
+        row["Detail"] = detail
+        if status != "failed":
+            track_index_build(idx_config, started_at, confirmed=status == "created")
+
+    show_status_table(rows)
+    failed: int = sum(1 for status, _ in results if status == "failed")
+    unconfirmed: int = sum(1 for status, _ in results if status == "unconfirmed")
+    if failed:
+        st.error(f"Failed to create {failed} of {len(configs)} indices.")
+    elif unconfirmed:
+        st.warning(f"{unconfirmed} of {len(configs)} requests timed out, Builds shows whether these indices appear.")
+    else:
+        st.success(f"Requested {len(configs)} indices, their progress is shown under Builds.")
+
+def _send_create_index(idx_config: Dict[str, Union[str, bool]], bearer_token: str) -> Tuple[str, str]:
+    """
+    Runs in a worker thread. Returns the status (`created`, `unconfirmed` or `failed`) and the message of `r2r`.
+    A concurrent build of a large table may outlast the timeout, but a timeout may as well mean
+    the request never reached postgres. Such builds are `unconfirmed` until the index appears.
+    """
+    try:
         response: requests.Response = requests.post(
             url="http://r2r:7272/v3/indices",
             headers={
-                "Authorization": f"Bearer {st.session_state['bearer_token']}",
+                "Authorization": f"Bearer {bearer_token}",
                 "Content-Type": "application/json"
             },
             json={
@@ -108,21 +190,22 @@ def create_index(file: UploadedFile):
             },
             timeout=5
         )
-        
-        if response.status_code != 200:
-            st.error(response.json()['detail']['message'])
-            return
-        
-        st.success(response.json()['results']['message'])
-    except ValueError as ve:
-        st.error(f"Error in YAML file structure: {str(ve)}")
-    finally:
-        temp_file.close()
+    except requests.ReadTimeout:
+        return "unconfirmed", "The request timed out, the build may still be running"
+    except requests.RequestException as e:
+        return "failed", str(e)
+
+    if response.status_code != 200:
+        try:
+            return "failed", response.json()['detail']['message']
+        except (ValueError, KeyError, TypeError):
+            return "failed", f"{response.status_code} - {response.text}"
 
+    return "created", response.json()['results']['message']
 
-def _load_index_config_from_yaml(filepath: Union[str,Path]) -> Index:
+def _parse_index(idx_name: str, config_data: Any) -> Index:
     """
-    Load index configuration from a YAML file.
+    Build an index configuration from a single top-level key of the YAML file.
 
     Expected structure:
     index_name:
@@ -133,30 +216,19 @@ def _load_index_config_from_yaml(filepath: Union[str,Path]) -> Index:
     Returns:
         Index object
     """
-    with open(file=filepath, mode='r', encoding='utf-8') as f:
-        data: Any = yaml.safe_load(f)
-
-    if not isinstance(data, Dict) or len(data.keys()) != 1:
-        raise ValueError(
-            "YAML file must contain exactly one top-level key representing the index name!"
-        )
-
-    idx_name: str = list(data.keys())[0]
-    config_data: Any = data[idx_name]
-
-    if 'index_method' not in config_data or 'index_measure' not in config_data:
+    if not isinstance(config_data, Dict) or 'index_method' not in config_data or 'index_measure' not in config_data:
         raise ValueError(
             "The top-level key must contain 'index_method' and 'index_measure' fields."
         )
 
     idx_method: str = config_data['index_method']
     idx_measure: str = config_data['index_measure']
-    idx_args: Dict = config_data.get('index_arguments', {})
+    idx_args: Dict = config_data.get('index_arguments') or {}
 
     if not idx_name or not idx_method or not idx_measure:
         raise ValueError("YAML file must contain index_name, index_method, and index_measure.")
 
-    return Index(idx_name, idx_method, idx_measure, idx_args)
+    return Index(str(idx_name), idx_method, idx_measure, idx_args)
 
 def _construct_index_config(
     index_method: str,
@@ -0,0 +1,308 @@
+# pylint: disable=C0114
+# pylint: disable=C0116
+# pylint: disable=C0301
+# pylint: disable=W0718
+
+import os
+import time
+import threading
+import dataclasses
+from typing import Dict, List, Union, Final, Any
+
+import psycopg
+import requests
+import streamlit as st
+
+from backend.chunking_collections import collection_filter
+
+BUILD_POLL_SECONDS: Final[int] = 5
+
+# The database of `r2r`, its catalog tells whether an index is valid and how far its build is
+R2R_DSN: Final[str] = os.getenv("R2R_DSN") or (
+    f"postgresql://{os.getenv('R2R_POSTGRES_USER', 'user')}:{os.getenv('R2R_POSTGRES_PASSWORD', 'password')}"
+    f"@{os.getenv('R2R_POSTGRES_HOST', 'pgvector-db')}:{os.getenv('R2R_POSTGRES_PORT', '5432')}"
+    f"/{os.getenv('R2R_POSTGRES_DBNAME', 'r2r')}"
+)
+
+# Build state of the indices: `indisvalid` and, while `CREATE INDEX CONCURRENTLY` runs, its progress.
+# `index_relid` is only set for concurrent builds, the others aren't visible before they're done anyway.
+BUILD_STATE_QUERY: Final[str] = """
+    SELECT c.relname, i.indisvalid, p.phase,
+           p.blocks_done, p.blocks_total, p.tuples_done, p.tuples_total
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    LEFT JOIN pg_stat_progress_create_index p ON p.index_relid = i.indexrelid
+    WHERE c.relname = ANY(%s)
+"""
+
+# Only if postgres can't be queried: the index is considered valid once its size and row estimate
+# didn't change for this long. Concurrent builds have phases (e.g. waiting for older transactions)
+# that change neither value, so this is a heuristic and deliberately generous.
+STABLE_SECONDS: Final[int] = int(os.getenv("INDEX_BUILD_STABLE_SECONDS", "60"))
+
+# A build whose create request timed out is given up if the index doesn't show up within this time
+APPEAR_TIMEOUT_SECONDS: Final[int] = 120
+
+# Number of queries replayed against a finished index to load it into the shared buffers
+WARMUP_QUERIES: Final[int] = 20
+
+@dataclasses.dataclass
+class IndexBuild:
+    name: str
+    table_name: str
+    measure: str
+    started_at: float
+    phase: str = "waiting"  # waiting -> building -> valid -> warming -> warmed | failed
+    # False if the create request timed out, the build may or may not have started
+    confirmed: bool = True
+    row_estimate: int = 0
+    target_rows: int = 0
+    size_in_bytes: int = 0
+    # Progress of the current phase of the build reported by postgres, None if unknown
+    fraction: Union[float, None] = None
+    fraction_since: Union[float, None] = None
+    stable_since: Union[float, None] = None
+    finished_at: Union[float, None] = None
+    detail: str = ""
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return (self.finished_at or time.time()) - self.started_at
+
+    @property
+    def progress(self) -> Union[float, None]:
+        """
+        Fraction of the current build phase done according to postgres, None if unknown.
+        Without postgres, the fraction of the table rows covered by the index. Postgres only
+        updates the row estimate of an index occasionally, so that one is rough.
+        """
+        if self.phase in ("valid", "warming", "warmed"):
+            return 1.0
+        if self.fraction is not None:
+            return min(self.fraction, 0.99)
+        if self.row_estimate <= 0 or self.target_rows <= 0:
+            return None
+        return min(self.row_estimate / self.target_rows, 0.99)
+
+    @property
+    def eta_seconds(self) -> Union[float, None]:
+        """
+        Remaining time of the current phase if postgres reports the progress, of the whole build otherwise.
+        """
+        progress: Union[float, None] = self.progress
+        if progress is None or progress >= 1.0 or progress == 0:
+            return None
+        elapsed: float = self.elapsed_seconds if self.fraction_since is None else time.time() - self.fraction_since
+        return elapsed * (1 - progress) / progress
+
+def _index_builds() -> Dict[str, IndexBuild]:
+    """
+    Builds tracked by the current session, by index name.
+    """
+    return st.session_state['index_builds']
+
+def track_index_build(idx_config: Dict[str, Any], started_at: float, confirmed: bool = True):
+    _index_builds()[idx_config['index_name']] = IndexBuild(
+        name=idx_config['index_name'],
+        table_name=idx_config['table_name'],
+        measure=idx_config['index_measure'],
+        started_at=started_at,
+        confirmed=confirmed,
+        detail="" if confirmed else "The create request timed out, waiting for the index to appear"
+    )
+
+def forget_finished_builds():
+    builds: Dict[str, IndexBuild] = _index_builds()
+    for name in [name for name, build in builds.items() if build.phase in ("warmed", "failed")]:
+        del builds[name]
+
+def _fetch_indices(bearer_token: str) -> List[Dict[str, Any]]:
+    response: requests.Response = requests.get(
+        url="http://r2r:7272/v3/indices",
+        headers={
+            "Authorization": f"Bearer {bearer_token}"
+        },
+        timeout=10
+    )
+
+    if response.status_code != 200:
+        raise requests.HTTPError(
+            f"Failed to fetch indices: {response.status_code} - {response.text}",
+            response=response
+        )
+
+    return [obj['index'] for obj in response.json()['results'].get('indices', [])]
+
+@dataclasses.dataclass
+class _BuildState:
+    valid: bool
+    # Phase of `CREATE INDEX CONCURRENTLY`, None once the command finished
+    phase: Union[str, None]
+    fraction: Union[float, None]
+
+def _fetch_build_states(names: List[str]) -> Dict[str, _BuildState]:
+    """
+    State of the indices that exist, by name. Raises `psycopg.Error` if postgres can't be queried.
+    """
+    with psycopg.connect(R2R_DSN, connect_timeout=5) as conn:
+        rows = conn.execute(BUILD_STATE_QUERY, (names, )).fetchall()
+
+    states: Dict[str, _BuildState] = {}
+    for name, valid, phase, blocks_done, blocks_total, tuples_done, tuples_total in rows:
+        # Scanning the table reports blocks, loading the tuples into the index reports tuples
+        fraction: Union[float, None] = None
+        if tuples_total:
+            fraction = tuples_done / tuples_total
+        elif blocks_total:
+            fraction = blocks_done / blocks_total
+        states[name] = _BuildState(valid=bool(valid), phase=phase, fraction=fraction)
+    return states
+
+def poll_index_builds(bearer_token: str):
+    """
+    Updates the phase of every tracked build from a single listing of the indices.
+
+    Whether an index is valid and how far its build is comes from the catalog of postgres
+    (`pg_index.indisvalid`, `pg_stat_progress_create_index`), `r2r` doesn't expose either.
+    The listing of `r2r` provides the size and row estimate of the index, the other indices
+    on the same table the number of rows to expect.
+    If postgres can't be queried, the phase is a heuristic based on the listing alone
+    (see `STABLE_SECONDS`), the detail of the build says so.
+    """
+    builds: List[IndexBuild] = [
+        build for build in _index_builds().values() if build.phase in ("waiting", "building")
+    ]
+    if not builds:
+        return
+
+    indices: List[Dict[str, Any]] = _fetch_indices(bearer_token)
+    by_name: Dict[str, Dict[str, Any]] = {index['name']: index for index in indices}
+
+    states: Union[Dict[str, _BuildState], None] = None
+    unavailable: str = ""
+    try:
+        states = _fetch_build_states([build.name for build in builds])
+    except psycopg.Error as e:
+        unavailable = str(e).strip()
+
+    now: float = time.time()
+    for build in builds:
+        index: Union[Dict[str, Any], None] = by_name.get(build.name)
+        state: Union[_BuildState, None] = None if states is None else states.get(build.name)
+        if index is None and state is None:
+            if not build.confirmed and now - build.started_at > APPEAR_TIMEOUT_SECONDS:
+                build.phase = "failed"
+                build.finished_at = now
+                build.detail = f"The create request timed out and the index didn't appear within {APPEAR_TIMEOUT_SECONDS} seconds"
+            continue
+
+        build.target_rows = max(
+            (int(other['row_estimate']) for other in indices
+             if other['table_name'] == build.table_name and other['name'] != build.name),
+            default=0
+        )
+
+        row_estimate: int = build.row_estimate if index is None else int(index['row_estimate'])
+        size_in_bytes: int = build.size_in_bytes if index is None else int(index['size_in_bytes'])
+        unchanged: bool = row_estimate == build.row_estimate and size_in_bytes == build.size_in_bytes
+        if not unchanged or size_in_bytes == 0 or build.stable_since is None:
+            build.stable_since = now
+        build.row_estimate = row_estimate
+        build.size_in_bytes = size_in_bytes
+        build.phase = "building"
+
+        if state is None:
+            # Listed by `r2r`, but postgres can't be queried or doesn't know the name
+            build.fraction = None
+            build.fraction_since = None
+            build.detail = f"Estimated, postgres can't be queried: {unavailable}" if unavailable else "Estimated, not found in the catalog of postgres"
+            if size_in_bytes > 0 and now - build.stable_since >= STABLE_SECONDS:
+                build.phase = "valid"
+                build.finished_at = now
+            continue
+
+        if state.phase != build.detail:
+            build.fraction_since = now
+        build.fraction = state.fraction
+        build.detail = state.phase or ""
+        if state.phase is not None:
+            continue
+
+        build.finished_at = now
+        if state.valid:
+            build.phase = "valid"
+        else:
+            # A failed concurrent build leaves an invalid index behind, it's never used by queries
+            build.phase = "failed"
+            build.detail = "The build failed, postgres left an invalid index behind"
+
+def representative_queries(limit: int = WARMUP_QUERIES) -> List[str]:
+    """
+    The most recent user queries of this session, used to warm up finished indices.
+    """
+    messages: List[Dict[str, str]] = list(st.session_state['messages'])
+    for cached in st.session_state['conversation_cache'].values():
+        messages.extend(cached)
+
+    queries: List[str] = []
+    for msg in reversed(messages):
+        if msg['role'] == "user" and msg['content'] not in queries:
+            queries.append(msg['content'])
+        if len(queries) >= limit:
+            break
+    return queries
+
+def start_warmup(build: IndexBuild, queries: List[str], bearer_token: str):
+    """
+    Warms the index up in a background thread, so the page stays responsive meanwhile.
+    The build shows the phase `warming` until it's done.
+    """
+    build.phase = "warming"
+    threading.Thread(
+        target=warm_index,
+        args=(build, queries, bearer_token, st.session_state['top_k'], st.session_state['collection_id']),
+        name=f"warm-{build.name}",
+        daemon=True
+    ).start()
+
+def warm_index(build: IndexBuild, queries: List[str], bearer_token: str, top_k: int, collection_id: str):
+    """
+    Replays `queries` as semantic searches with the measure of the index, so that its pages
+    are read into memory before the first real request. Doesn't touch the session, see `start_warmup`.
+    """
+    for query in queries:
+        try:
+            response: requests.Response = requests.post(
+                url="http://r2r:7272/v3/retrieval/search",
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {bearer_token}"
+                },
+                json={
+                    "query": query,
+                    "search_settings": {
+                        "use_semantic_search": True,
+                        "limit": top_k,
+                        "search_strategy": "vanilla",
+                        "chunk_settings": {
+                            "index_measure": build.measure,
+                            "enabled": True
+                        },
+                        "filters": collection_filter(collection_id)
+                    },
+                    "search_mode": "custom"
+                },
+                timeout=60
+            )
+        except requests.RequestException as e:
+            build.phase = "failed"
+            build.detail = f"Warm-up failed: {e}"
+            return
+
+        if response.status_code != 200:
+            build.phase = "failed"
+            build.detail = f"Warm-up failed: {response.status_code} - {response.text}"
+            return
+
+    build.phase = "warmed"
+    build.detail = f"Warmed with {len(queries)} queries"
@@ -0,0 +1,211 @@
+# pylint: disable=C0114
+# pylint: disable=C0116
+# pylint: disable=C0301
+# pylint: disable=W0718
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Tuple, Union, Final, Any
+
+import requests
+import pandas as pd
+import streamlit as st
+
+from backend.system import R2R_USERNAME, R2R_PASSWORD, login
+
+STATS_DB_PATH: Final[str] = os.getenv("INDEX_STATS_DB", "index_stats.sqlite3")
+SAMPLE_INTERVAL_SECONDS: Final[int] = int(os.getenv("INDEX_STATS_INTERVAL_SECONDS", "60"))
+
+# Counters reported by `r2r` for every index
+COUNTERS: Final[Tuple[str, ...]] = ("number_of_scans", "tuples_read", "tuples_fetched")
+
+logger = logging.getLogger(__name__)
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(STATS_DB_PATH, timeout=10)
+    # Readers (the page) don't block the sampler and vice versa
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS index_stats (
+            sampled_at REAL NOT NULL,
+            index_name TEXT NOT NULL,
+            table_name TEXT,
+            size_in_bytes INTEGER,
+            number_of_scans INTEGER,
+            tuples_read INTEGER,
+            tuples_fetched INTEGER,
+            interval_seconds REAL,
+            delta_size_in_bytes INTEGER,
+            delta_number_of_scans INTEGER,
+            delta_tuples_read INTEGER,
+            delta_tuples_fetched INTEGER
+        )
+    """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS index_stats_name_time ON index_stats (index_name, sampled_at)"
+    )
+    return conn
+
+class IndexStatsSampler(threading.Thread):
+    """
+    Polls the index statistics of `r2r` and stores the deltas between two samples in SQLite.
+    One daemon thread per process, see `index_stats_sampler`.
+    """
+
+    def __init__(self, interval_seconds: int = SAMPLE_INTERVAL_SECONDS):
+        super().__init__(name="index-stats-sampler", daemon=True)
+        self.interval_seconds: int = interval_seconds
+        self.last_error: Union[str, None] = None
+        self._token: Union[str, None] = None
+        self._previous: Dict[str, Dict[str, Any]] = {}
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        conn: sqlite3.Connection = _connect()
+        self._previous = self._load_previous(conn)
+        while not self._stop_event.is_set():
+            try:
+                self.sample(conn)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning("Failed to sample index statistics: %s", e)
+            self._stop_event.wait(self.interval_seconds)
+        conn.close()
+
+    def _load_previous(self, conn: sqlite3.Connection) -> Dict[str, Dict[str, Any]]:
+        # Continue the series after a restart instead of starting with a gap
+        rows = conn.execute("""
+            SELECT index_name, sampled_at, size_in_bytes, number_of_scans, tuples_read, tuples_fetched
+            FROM index_stats AS s
+            WHERE sampled_at = (SELECT MAX(sampled_at) FROM index_stats WHERE index_name = s.index_name)
+        """).fetchall()
+        return {
+            row[0]: dict(zip(("sampled_at", "size_in_bytes") + COUNTERS, row[1:]))
+            for row in rows
+        }
+
+    def _fetch_indices(self) -> List[Dict[str, Any]]:
+        if self._token is None:
+            self._token = login(R2R_USERNAME, R2R_PASSWORD)
+
+        response: requests.Response = requests.get(
+            url="http://r2r:7272/v3/indices",
+            headers={
+                "Authorization": f"Bearer {self._token}"
+            },
+            timeout=10
+        )
+
+        if response.status_code == 401: # Token expired, login again on the next sample
+            self._token = None
+
+        if response.status_code != 200:
+            raise requests.HTTPError(
+                f"Failed to fetch indices: {response.status_code} - {response.text}",
+                response=response
+            )
+
+        return [obj['index'] for obj in response.json()['results'].get('indices', [])]
+
+    def sample(self, conn: sqlite3.Connection):
+        now: float = time.time()
+        rows: List[Tuple] = []
+        for index in self._fetch_indices():
+            current: Dict[str, Any] = {
+                "sampled_at": now,
+                "size_in_bytes": int(index['size_in_bytes']),
+                **{counter: int(index[counter]) for counter in COUNTERS}
+            }
+            previous: Union[Dict[str, Any], None] = self._previous.get(index['name'])
+            self._previous[index['name']] = current
+
+            if previous is None:
+                continue
+
+            deltas: List[int] = []
+            for counter in COUNTERS:
+                delta: int = current[counter] - previous[counter]
+                # The statistics were reset, e.g. by a restart of postgres
+                deltas.append(current[counter] if delta < 0 else delta)
+
+            rows.append((
+                now,
+                index['name'],
+                index['table_name'],
+                current['size_in_bytes'],
+                *(current[counter] for counter in COUNTERS),
+                now - previous['sampled_at'],
+                current['size_in_bytes'] - previous['size_in_bytes'],
+                *deltas
+            ))
+
+        # The first sample of an index only establishes the baseline
+        if not rows:
+            return
+
+        with conn:
+            conn.executemany(
+                "INSERT INTO index_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+@st.cache_resource
+def index_stats_sampler() -> IndexStatsSampler:
+    sampler = IndexStatsSampler()
+    sampler.start()
+    return sampler
+
+def load_index_stats(window_seconds: int) -> pd.DataFrame:
+    """
+    Returns the samples of the last `window_seconds` with the derived rates:
+    scans per second, tuples read per scan and size growth.
+    """
+    conn: sqlite3.Connection = _connect()
+    try:
+        stats: pd.DataFrame = pd.read_sql_query(
+            "SELECT * FROM index_stats WHERE sampled_at >= ? ORDER BY sampled_at",
+            conn,
+            params=(time.time() - window_seconds, )
+        )
+    finally:
+        conn.close()
+
+    stats['sampled_at'] = pd.to_datetime(stats['sampled_at'], unit="s")
+    stats['scans_per_second'] = stats['delta_number_of_scans'] / stats['interval_seconds']
+    # Undefined if there were no scans in the interval
+    stats['tuples_read_per_scan'] = (
+        stats['delta_tuples_read'] / stats['delta_number_of_scans'].where(stats['delta_number_of_scans'] > 0)
+    )
+    return stats
+
+def summarize_index_stats(stats: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per index: scans in the window, tuples read per scan in the first and
+    second half of the window and the size growth. Used to spot unused indices
+    and degrading selectivity.
+    """
+    rows: List[Dict[str, Any]] = []
+    for name, group in stats.groupby('index_name'):
+        half: int = len(group) // 2
+        first, second = group.iloc[:half], group.iloc[half:]
+
+        def per_scan(part: pd.DataFrame) -> float:
+            scans: int = part['delta_number_of_scans'].sum()
+            return part['delta_tuples_read'].sum() / scans if scans else float("nan")
+
+        rows.append({
+            "Index": name,
+            "Scans": int(group['delta_number_of_scans'].sum()),
+            "Tuples read / scan (earlier)": per_scan(first),
+            "Tuples read / scan (recent)": per_scan(second),
+            "Size growth (bytes)": int(group['delta_size_in_bytes'].sum()),
+            "Current size (bytes)": int(group['size_in_bytes'].iloc[-1])
+        })
+    return pd.DataFrame(rows)
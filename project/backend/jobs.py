@@ -0,0 +1,315 @@
+# pylint: disable=C0114
+# pylint: disable=C0116
+# pylint: disable=C0301
+# pylint: disable=W0718
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+import dataclasses
+from typing import Dict, List, Callable, Protocol, Union, Final, Any
+
+import pandas as pd
+import streamlit as st
+
+from backend.system import R2R_USERNAME, R2R_PASSWORD, TOKEN_TTL_SECONDS, login
+
+JOBS_DB_PATH: Final[str] = os.getenv("JOBS_DB", "jobs.sqlite3")
+POLL_INTERVAL_SECONDS: Final[float] = 1.0
+
+JOB_STATUSES: Final[List[str]] = ["queued", "running", "done", "failed"]
+
+logger = logging.getLogger(__name__)
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(JOBS_DB_PATH, timeout=10)
+    # The page reads while the worker writes
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            title TEXT NOT NULL,
+            status TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            content BLOB,
+            total INTEGER NOT NULL DEFAULT 0,
+            done INTEGER NOT NULL DEFAULT 0,
+            errors INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            error TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS job_events (
+            job_id INTEGER NOT NULL,
+            at REAL NOT NULL,
+            level TEXT NOT NULL,
+            message TEXT NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS job_events_job ON job_events (job_id, at)")
+    return conn
+
+@dataclasses.dataclass
+class Job:
+    id: int
+    kind: str
+    title: str
+    payload: Dict[str, Any]
+    content: Union[bytes, None]
+    _bearer_token: str = dataclasses.field(default="", repr=False)
+    _logged_in_at: float = 0.0
+
+    def token(self) -> str:
+        """
+        A token of the admin user. Jobs can run for hours, longer than a token lives,
+        so it's renewed by logging in again once it's older than `TOKEN_TTL_SECONDS`.
+        Handlers call this per item instead of keeping the token.
+        """
+        if time.time() - self._logged_in_at > TOKEN_TTL_SECONDS:
+            self._bearer_token = login(R2R_USERNAME, R2R_PASSWORD)
+            self._logged_in_at = time.time()
+        return self._bearer_token
+
+class Reporter(Protocol):
+    """
+    Where progress messages go: `st` itself in the browser session, a `JobReporter` in a job.
+    """
+    def error(self, message: Any): ...
+    def warning(self, message: Any): ...
+    def success(self, message: Any): ...
+    def info(self, message: Any): ...
+    def write(self, message: Any): ...
+
+class JobReporter:
+    """
+    Stands in for `st` while a job runs: `error`, `warning`, `success`, `info` and `write`
+    are recorded as events of the job instead of being rendered.
+    """
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+
+    def _event(self, level: str, message: Any):
+        conn: sqlite3.Connection = _connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO job_events VALUES (?, ?, ?, ?)",
+                    (self.job_id, time.time(), level, str(message))
+                )
+                if level == "error":
+                    conn.execute("UPDATE jobs SET errors = errors + 1 WHERE id = ?", (self.job_id, ))
+        finally:
+            conn.close()
+
+    def error(self, message: Any):
+        self._event("error", message)
+
+    def warning(self, message: Any):
+        self._event("warning", message)
+
+    def success(self, message: Any):
+        self._event("success", message)
+
+    def info(self, message: Any):
+        self._event("info", message)
+
+    def write(self, message: Any):
+        self._event("info", message)
+
+    def progress(self, done: int, total: int):
+        conn: sqlite3.Connection = _connect()
+        try:
+            with conn:
+                conn.execute("UPDATE jobs SET done = ?, total = ? WHERE id = ?", (done, total, self.job_id))
+        finally:
+            conn.close()
+
+# Maps the kind of a job to the function executing it
+JOB_HANDLERS: Dict[str, Callable[[Job, JobReporter], None]] = {}
+
+def register_job_handler(kind: str) -> Callable:
+    def decorator(handler: Callable[[Job, JobReporter], None]) -> Callable[[Job, JobReporter], None]:
+        JOB_HANDLERS[kind] = handler
+        return handler
+    return decorator
+
+def enqueue_job(kind: str, title: str, payload: Dict[str, Any], content: Union[bytes, None] = None, total: int = 1) -> int:
+    """
+    Persists the job, it's picked up by the worker in the order of submission.
+    `content` holds the uploaded file, since the upload doesn't outlive the browser session.
+    """
+    conn: sqlite3.Connection = _connect()
+    try:
+        with conn:
+            cursor: sqlite3.Cursor = conn.execute(
+                """
+                INSERT INTO jobs (kind, title, status, payload, content, total, created_at)
+                VALUES (?, ?, 'queued', ?, ?, ?, ?)
+                """,
+                (kind, title, json.dumps(payload), content, total, time.time())
+            )
+            return cursor.lastrowid
+    finally:
+        conn.close()
+
+class JobWorker(threading.Thread):
+    """
+    Executes the queued jobs one at a time. One daemon thread per process, see `job_worker`.
+    Jobs survive restarts: whatever was running when the process stopped is queued again.
+    """
+
+    def __init__(self, poll_interval_seconds: float = POLL_INTERVAL_SECONDS):
+        super().__init__(name="job-worker", daemon=True)
+        self.poll_interval_seconds: float = poll_interval_seconds
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        self._requeue_interrupted()
+        while not self._stop_event.is_set():
+            job: Union[Job, None] = self._claim()
+            if job is None:
+                self._stop_event.wait(self.poll_interval_seconds)
+                continue
+            self._execute(job)
+
+    def _requeue_interrupted(self):
+        conn: sqlite3.Connection = _connect()
+        try:
+            with conn:
+                ids: List[int] = [row[0] for row in conn.execute("SELECT id FROM jobs WHERE status = 'running'")]
+                conn.executemany(
+                    "INSERT INTO job_events VALUES (?, ?, 'warning', 'Interrupted by a restart, queued again')",
+                    [(job_id, time.time()) for job_id in ids]
+                )
+                conn.execute("UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'")
+        finally:
+            conn.close()
+
+    def _claim(self) -> Union[Job, None]:
+        """
+        Marks the oldest queued job with a registered handler as running.
+        The write lock is taken before reading, so a job is never claimed twice,
+        e.g. by the worker of another process sharing the database.
+        """
+        kinds: List[str] = list(JOB_HANDLERS)
+        if not kinds:
+            return None
+
+        conn: sqlite3.Connection = _connect()
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    f"""
+                    SELECT id, kind, title, payload, content FROM jobs
+                    WHERE status = 'queued' AND kind IN ({", ".join("?" * len(kinds))})
+                    ORDER BY id LIMIT 1
+                    """,
+                    kinds
+                ).fetchone()
+                if row is None:
+                    return None
+                claimed: int = conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ? AND status = 'queued'",
+                    (time.time(), row[0])
+                ).rowcount
+        finally:
+            conn.close()
+
+        if claimed != 1:
+            return None
+        return Job(id=row[0], kind=row[1], title=row[2], payload=json.loads(row[3]), content=row[4])
+
+    def _execute(self, job: Job):
+        reporter: JobReporter = JobReporter(job.id)
+        error: Union[str, None] = None
+        try:
+            # Only jobs with a handler are claimed
+            handler: Callable[[Job, JobReporter], None] = JOB_HANDLERS[job.kind]
+            handler(job, reporter)
+        except Exception as e:
+            error = str(e)
+            reporter.error(error)
+            logger.warning("Job %s (%s) failed: %s", job.id, job.kind, e)
+
+        conn: sqlite3.Connection = _connect()
+        try:
+            with conn:
+                # The file isn't needed anymore once the job finished
+                conn.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ?, error = ?, content = NULL WHERE id = ?",
+                    ("failed" if error else "done", time.time(), error, job.id)
+                )
+        finally:
+            conn.close()
+
+@st.cache_resource
+def job_worker() -> JobWorker:
+    worker = JobWorker()
+    worker.start()
+    return worker
+
+def load_jobs(limit: int = 200) -> pd.DataFrame:
+    """
+    The most recent jobs with their duration and throughput (items per second).
+    """
+    conn: sqlite3.Connection = _connect()
+    try:
+        jobs: pd.DataFrame = pd.read_sql_query(
+            """
+            SELECT id, kind, title, status, total, done, errors, created_at, started_at, finished_at, error
+            FROM jobs ORDER BY id DESC LIMIT ?
+            """,
+            conn,
+            params=(limit, )
+        )
+    finally:
+        conn.close()
+
+    now: float = time.time()
+    jobs['duration_seconds'] = jobs['finished_at'].fillna(now) - jobs['started_at']
+    jobs['items_per_second'] = jobs['done'] / jobs['duration_seconds'].where(jobs['duration_seconds'] > 0)
+    jobs['progress'] = jobs['done'] / jobs['total'].where(jobs['total'] > 0)
+    for column in ("created_at", "started_at", "finished_at"):
+        jobs[column] = pd.to_datetime(jobs[column], unit="s")
+    return jobs
+
+def load_job_events(job_id: int) -> pd.DataFrame:
+    conn: sqlite3.Connection = _connect()
+    try:
+        events: pd.DataFrame = pd.read_sql_query(
+            "SELECT at, level, message FROM job_events WHERE job_id = ? ORDER BY at",
+            conn,
+            params=(job_id, )
+        )
+    finally:
+        conn.close()
+
+    events['at'] = pd.to_datetime(events['at'], unit="s")
+    return events
+
+def clear_finished_jobs() -> int:
+    """
+    Removes the finished jobs and their events, returns the number of removed jobs.
+    """
+    conn: sqlite3.Connection = _connect()
+    try:
+        with conn:
+            conn.execute(
+                "DELETE FROM job_events WHERE job_id IN (SELECT id FROM jobs WHERE status IN ('done', 'failed'))"
+            )
+            return conn.execute("DELETE FROM jobs WHERE status IN ('done', 'failed')").rowcount
+    finally:
+        conn.close()
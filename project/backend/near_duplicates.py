@@ -0,0 +1,178 @@
+# pylint: disable=C0114
+# pylint: disable=C0116
+# pylint: disable=C0301
+
+import re
+import zlib
+import itertools
+import dataclasses
+from typing import Dict, List, Set, Iterable, Iterator, Tuple, Union, Final
+
+import numpy as np
+
+# MinHash signatures of word shingles, bucketed with LSH (banding).
+# With 16 bands of 8 rows, pairs with a Jaccard similarity of 0.8 collide in at least one band
+# with a probability of ~99.8%, pairs below 0.5 only in ~6% of the cases.
+NUM_PERM: Final[int] = 128
+BANDS: Final[int] = 16
+ROWS: Final[int] = NUM_PERM // BANDS
+SHINGLE_SIZE: Final[int] = 5
+DEFAULT_THRESHOLD: Final[float] = 0.8
+
+# Universal hashing modulo a Mersenne prime. The 32 bit shingle hashes keep `a * x + b` within 64 bits.
+_PRIME: Final[np.uint64] = np.uint64((1 << 31) - 1)
+# A fixed seed, so that signatures of different runs and processes are comparable
+_RNG: Final[np.random.Generator] = np.random.default_rng(7919)
+_A: Final[np.ndarray] = _RNG.integers(1, (1 << 31) - 1, size=NUM_PERM, dtype=np.uint64)
+_B: Final[np.ndarray] = _RNG.integers(0, (1 << 31) - 1, size=NUM_PERM, dtype=np.uint64)
+
+# Rough size of a chunk in the HNSW index besides its vector: the layer 0 links with the default m = 16
+INDEX_BYTES_PER_CHUNK: Final[int] = 2 * 16 * 6
+
+_WORD: Final[re.Pattern] = re.compile(r"\w+")
+
+def _shingle_hashes(text: str) -> np.ndarray:
+    words: List[str] = _WORD.findall(text.lower())
+    if len(words) <= SHINGLE_SIZE:
+        grams: List[str] = [" ".join(words)]
+    else:
+        grams = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+    return np.fromiter(
+        (zlib.crc32(gram.encode("utf-8")) & 0x7FFFFFFF for gram in set(grams)),
+        dtype=np.uint64
+    )
+
+def minhash(text: str) -> np.ndarray:
+    """
+    Signature of `NUM_PERM` values, the fraction of equal values of two signatures
+    estimates the Jaccard similarity of their shingle sets.
+    """
+    hashes: np.ndarray = _shingle_hashes(text)
+    return ((np.outer(_A, hashes) + _B[:, None]) % _PRIME).min(axis=1).astype(np.uint32)
+
+def similarity(left: np.ndarray, right: np.ndarray) -> float:
+    return float(np.count_nonzero(left == right)) / NUM_PERM
+
+class MinHashLSH:
+    """
+    Keeps a single representative per band bucket. A chunk is looked up against at most
+    `BANDS` representatives, so adding n chunks takes O(n) time and memory even when
+    thousands of them are copies of the same footer.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._buckets: List[Dict[bytes, str]] = [{} for _ in range(BANDS)]
+        self._signatures: Dict[str, np.ndarray] = {}
+        # Ids of chunks that don't have one yet, never reused
+        self._new_ids: Iterator[int] = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def new_id(self) -> str:
+        return f"new-{next(self._new_ids)}"
+
+    @staticmethod
+    def _bands(signature: np.ndarray) -> Iterable[Tuple[int, bytes]]:
+        for band in range(BANDS):
+            yield band, signature[band * ROWS:(band + 1) * ROWS].tobytes()
+
+    def find(self, signature: np.ndarray) -> Union[str, None]:
+        """
+        Id of a representative at least `threshold` similar to the signature, if any.
+        """
+        checked: Set[str] = set()
+        for band, key in self._bands(signature):
+            candidate: Union[str, None] = self._buckets[band].get(key)
+            if candidate is None or candidate in checked:
+                continue
+            checked.add(candidate)
+            if similarity(signature, self._signatures[candidate]) >= self.threshold:
+                return candidate
+        return None
+
+    def add(self, chunk_id: str, signature: np.ndarray):
+        self._signatures[chunk_id] = signature
+        for band, key in self._bands(signature):
+            self._buckets[band].setdefault(key, chunk_id)
+
+    def add_if_new(self, chunk_id: str, text: str) -> Union[str, None]:
+        """
+        Adds the chunk as a representative unless it's a near-duplicate.
+        Returns the id of the representative it duplicates, None if it was added.
+        """
+        signature: np.ndarray = minhash(text)
+        representative: Union[str, None] = self.find(signature)
+        if representative is None:
+            self.add(chunk_id, signature)
+        return representative
+
+@dataclasses.dataclass
+class DuplicateCluster:
+    representative_id: str
+    representative_text: str
+    duplicate_ids: List[str] = dataclasses.field(default_factory=list)
+    duplicate_bytes: int = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.duplicate_ids) + 1
+
+@dataclasses.dataclass
+class DuplicateReport:
+    total_chunks: int
+    clusters: List[DuplicateCluster]
+
+    @property
+    def duplicate_chunks(self) -> int:
+        return sum(len(cluster.duplicate_ids) for cluster in self.clusters)
+
+    def estimated_savings(self, dimension: int) -> int:
+        """
+        Bytes saved by not storing the duplicates: their float32 vectors,
+        their text and their links in the HNSW index.
+        """
+        return (
+            self.duplicate_chunks * (dimension * 4 + INDEX_BYTES_PER_CHUNK)
+            + sum(cluster.duplicate_bytes for cluster in self.clusters)
+        )
+
+def find_duplicate_clusters(chunks: Iterable[Dict[str, str]], threshold: float = DEFAULT_THRESHOLD) -> DuplicateReport:
+    """
+    Groups the chunks (id and text) in a single pass. The first chunk of a group becomes its
+    representative, every later chunk similar to it joins the group.
+    """
+    lsh: MinHashLSH = MinHashLSH(threshold)
+    clusters: Dict[str, DuplicateCluster] = {}
+    texts: Dict[str, str] = {}
+    total: int = 0
+    for chunk in chunks:
+        total += 1
+        representative: Union[str, None] = lsh.add_if_new(chunk['id'], chunk['text'])
+        if representative is None:
+            # Only representatives' texts are kept, for the report
+            texts[chunk['id']] = chunk['text']
+            continue
+
+        cluster: DuplicateCluster = clusters.setdefault(
+            representative, DuplicateCluster(representative, texts[representative])
+        )
+        cluster.duplicate_ids.append(chunk['id'])
+        cluster.duplicate_bytes += len(chunk['text'].encode("utf-8"))
+
+    return DuplicateReport(
+        total_chunks=total,
+        clusters=sorted(clusters.values(), key=lambda cluster: cluster.size, reverse=True)
+    )
+
+def drop_near_duplicates(texts: List[str], lsh: Union[MinHashLSH, None] = None, threshold: float = DEFAULT_THRESHOLD) -> List[int]:
+    """
+    Positions of the texts to keep: the first of every group of near-duplicates,
+    unless it duplicates a chunk already in `lsh`. Kept texts are added to `lsh`.
+    """
+    lsh = lsh if lsh is not None else MinHashLSH(threshold)
+    return [
+        i for i, text in enumerate(texts)
+        if lsh.add_if_new(lsh.new_id(), text) is None
+    ]
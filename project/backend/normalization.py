@@ -0,0 +1,85 @@
+# pylint: disable=C0114
+# pylint: disable=C0116
+# pylint: disable=C0301
+
+import re
+import dataclasses
+from typing import Callable, Dict, List, Tuple, Union, Final
+
+import markdown
+from bs4 import BeautifulSoup
+
+Normalizer = Callable[[str], str]
+
+# Registered normalizers by name, see `register_normalizer`
+NORMALIZERS: Dict[str, Normalizer] = {}
+
+# Elements of a web page that carry no content worth retrieving
+BOILERPLATE_TAGS: Final[Tuple[str, ...]] = (
+    "script", "style", "noscript", "template", "iframe", "svg",
+    "nav", "header", "footer", "aside", "form", "button"
+)
+
+def register_normalizer(name: str) -> Callable[[Normalizer], Normalizer]:
+    """
+    Makes a normalizer available under `name`, so it can be used in `PIPELINES`.
+    """
+    def decorator(normalizer: Normalizer) -> Normalizer:
+        NORMALIZERS[name] = normalizer
+        return normalizer
+    return decorator
+
+@register_normalizer("markdown")
+def markdown_to_text(content: str) -> str:
+    # Same conversion as in `evaluation/ragas_eval/generate.ipynb`
+    html: str = markdown.markdown(content)
+    return BeautifulSoup(html, features="html.parser").get_text()
+
+@register_normalizer("html")
+def strip_html_boilerplate(content: str) -> str:
+    soup = BeautifulSoup(content, features="lxml")
+    for tag in soup(BOILERPLATE_TAGS):
+        tag.decompose()
+    # Keep the block structure, otherwise words of adjacent elements are glued together
+    return soup.get_text(separator="\n")
+
+@register_normalizer("whitespace")
+def collapse_whitespace(content: str) -> str:
+    lines: List[str] = [re.sub(r"[ \t\f\v\u00a0]+", " ", line).strip() for line in content.splitlines()]
+    # At most one empty line between paragraphs
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+# Normalizers applied in order, per MIME type of the content
+PIPELINES: Dict[str, List[str]] = {
+    "text/markdown": ["markdown", "whitespace"],
+    "text/html": ["html", "whitespace"],
+    "text/plain": ["whitespace"]
+}
+
+@dataclasses.dataclass
+class NormalizationResult:
+    text: str
+    original_bytes: int
+    normalized_bytes: int
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - self.normalized_bytes
+
+def is_normalizable(mime_type: Union[str, None]) -> bool:
+    return mime_type in PIPELINES
+
+def normalize(content: str, mime_type: str) -> NormalizationResult:
+    """
+    Runs the pipeline of `mime_type` over `content`.
+    Content without a pipeline is returned unchanged.
+    """
+    text: str = content
+    for name in PIPELINES.get(mime_type, []):
+        text = NORMALIZERS[name](text)
+
+    return NormalizationResult(
+        text=text,
+        original_bytes=len(content.encode("utf-8")),
+        normalized_bytes=len(text.encode("utf-8"))
+    )
@@ -0,0 +1,137 @@
+# pylint: disable=C0114
+# pylint: disable=C0116
+# pylint: disable=C0301
+
+import os
+import json
+import base64
+import hashlib
+import tempfile
+from typing import Dict, List, Tuple, Callable, Union, Final, Any
+
+import requests
+
+# Kept free of streamlit, so that the evaluation notebooks can share the cache with the application
+
+# Folder of the cache, one JSON file per (content, file extension, ingestion config) triple
+CACHE_DIR: Final[str] = os.getenv("PARTITION_CACHE_DIR", "partition_cache")
+
+# `hi_res` partitioning of scanned PDFs takes long, same limit as an ingestion through `r2r`
+PARTITION_TIMEOUT_SECONDS: Final[int] = int(os.getenv("PARTITION_TIMEOUT_SECONDS", "3600"))
+
+# Settings of the ingestion config that change the chunks, everything else is ignored for the key
+CACHE_KEY_FIELDS: Final[Tuple[str, ...]] = (
+    "strategy",
+    "chunking_strategy",
+    "max_characters",
+    "new_after_n_chars",
+    "overlap",
+    "combine_text_under_n_chars"
+)
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+def config_hash(ingestion_config: Dict[str, Any]) -> str:
+    """
+    Hash of the settings relevant to partitioning and chunking.
+    Accepts both the full `r2r` ingestion config and its `extra_fields` (what `unstructured` receives),
+    the extra fields take precedence like they do in `r2r`.
+    """
+    merged: Dict[str, Any] = {**ingestion_config, **(ingestion_config.get('extra_fields') or {})}
+    relevant: Dict[str, str] = {
+        field: str(merged[field]) for field in CACHE_KEY_FIELDS if merged.get(field) is not None
+    }
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True).encode("utf-8")).hexdigest()
+
+class PartitionCache:
+    """
+    Content-addressed disk cache of chunk texts.
+    Entries are never invalidated: a changed file or config simply leads to another key.
+    The file extension is part of the key, since `unstructured` picks the partitioner by it.
+    """
+
+    def __init__(self, folder: str = CACHE_DIR):
+        self.folder = folder
+
+    def _path(self, content: bytes, filename: str, ingestion_config: Dict[str, Any]) -> str:
+        digest: str = content_hash(content)
+        extension: str = os.path.splitext(filename)[1].lower().lstrip(".")
+        return os.path.join(self.folder, digest[:2], f"{digest}-{extension}-{config_hash(ingestion_config)}.json")
+
+    def get(self, content: bytes, filename: str, ingestion_config: Dict[str, Any]) -> Union[List[str], None]:
+        try:
+            with open(self._path(content, filename, ingestion_config), mode="r", encoding="utf-8") as f:
+                return json.load(f)['chunks']
+        except (OSError, ValueError, KeyError):
+            # Missing or unreadable (e.g. truncated) entries are a miss, the chunks get recomputed
+            return None
+
+    def put(self, content: bytes, filename: str, ingestion_config: Dict[str, Any], chunks: List[str]):
+        path: str = self._path(content, filename, ingestion_config)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Written to a temporary file first, so that a reader never sees half an entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, mode="w", encoding="utf-8") as f:
+                json.dump({"filename": filename, "chunks": chunks}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def chunks(
+        self,
+        content: bytes,
+        filename: str,
+        ingestion_config: Dict[str, Any],
+        partition: Callable[[bytes, str, Dict[str, Any]], List[str]]
+    ) -> Tuple[List[str], bool]:
+        """
+        Returns the chunks of `content` and whether they came from the cache.
+        `partition` is only called on a miss.
+        """
+        cached: Union[List[str], None] = self.get(content, filename, ingestion_config)
+        if cached is not None:
+            return cached, True
+
+        texts: List[str] = partition(content, filename, ingestion_config)
+        self.put(content, filename, ingestion_config, texts)
+        return texts, False
+
+def request_config(ingestion_config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The config `r2r` sends to `unstructured`: the extra fields plus the chunking strategy.
+    """
+    config: Dict[str, Any] = dict(ingestion_config.get('extra_fields') or {})
+    config.setdefault('chunking_strategy', ingestion_config.get('chunking_strategy'))
+    return config
+
+def partition_remote(
+    content: bytes,
+    filename: str,
+    ingestion_config: Dict[str, Any],
+    base_url: str = "http://unstructured:7275"
+) -> List[str]:
+    """
+    Partitions and chunks the file with the `unstructured` service `r2r` uses.
+    `ingestion_config` is the request config, i.e. the `extra_fields` with the chunking strategy.
+    """
+    response: requests.Response = requests.post(
+        url=f"{base_url}/partition",
+        json={
+            "file_content": base64.b64encode(content).decode("utf-8"),
+            "filename": filename,
+            "ingestion_config": ingestion_config
+        },
+        timeout=PARTITION_TIMEOUT_SECONDS
+    )
+
+    if response.status_code != 200:
+        raise requests.HTTPError(
+            f"Failed to partition {filename}: {response.status_code} - {response.text}",
+            response=response
+        )
+
+    return [el['text'] for el in response.json()['elements'] if el['text']]
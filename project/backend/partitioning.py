@@ -0,0 +1,66 @@
+# pylint: disable=C0114
+# pylint: disable=C0116
+# pylint: disable=C0301
+# pylint: disable=W0718
+
+import io
+import copy
+from typing import Dict, Tuple, Union, Final, Any
+
+import streamlit as st
+
+# https://docs.unstructured.io/open-source/concepts/partitioning-strategies
+# `auto` lets the client decide per document, the rest are passed to `unstructured` as is.
+PARTITION_STRATEGIES: Final[Tuple[str, ...]] = ("auto", "fast", "hi_res", "ocr_only")
+
+# Formats `unstructured` extracts without a layout model, `hi_res` gains nothing for them
+TEXT_MIME_TYPES: Final[Tuple[str, ...]] = (
+    "application/json",
+    "application/xml",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+)
+
+# A PDF whose first pages yield fewer characters is treated as scanned
+PDF_SAMPLE_PAGES: Final[int] = 3
+PDF_MIN_CHARS_PER_PAGE: Final[int] = 100
+
+def has_text_layer(data: bytes) -> bool:
+    """
+    Extracts the text of the first pages with `pdfminer` (a dependency of `unstructured[pdf]`).
+    Scanned PDFs yield (almost) no text and need OCR, i.e. `hi_res`.
+    """
+    try:
+        from pdfminer.high_level import extract_text # pylint: disable=C0415
+        from pdfminer.pdfpage import PDFPage # pylint: disable=C0415
+    except ImportError:
+        return False
+
+    try:
+        pages: int = sum(1 for _ in PDFPage.get_pages(io.BytesIO(data), maxpages=PDF_SAMPLE_PAGES))
+        text: str = extract_text(io.BytesIO(data), maxpages=PDF_SAMPLE_PAGES)
+    except Exception: # Malformed or encrypted, let `unstructured` deal with it
+        return False
+
+    return pages > 0 and len("".join(text.split())) >= pages * PDF_MIN_CHARS_PER_PAGE
+
+def select_strategy(mime_type: str, data: bytes) -> str:
+    """
+    `fast` for text-like formats and PDFs with an extractable text layer,
+    `hi_res` for scanned PDFs, images and anything unknown.
+    """
+    if mime_type.startswith("text/") or mime_type in TEXT_MIME_TYPES:
+        return "fast"
+
+    if mime_type == "application/pdf" and has_text_layer(data):
+        return "fast"
+
+    return "hi_res"
+
+def ingestion_config_for(strategy: str, base: Union[Dict[str, Any], None] = None) -> Dict[str, Any]:
+    """
+    The ingestion config of the session (or `base`) with the partitioning strategy replaced.
+    The original config itself is left untouched.
+    """
+    config: Dict[str, Any] = copy.deepcopy(base if base is not None else st.session_state['ingestion_config'])
+    config['extra_fields']['strategy'] = strategy
+    return config
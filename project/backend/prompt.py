@@ -4,38 +4,143 @@
 # pylint: disable=R1732
 # pylint: disable=W0718
 
-import tempfile
+import time
+import string
+import threading
 import dataclasses
 from datetime import datetime
-from typing import Union, Dict, List, Any
+from typing import Union, Dict, List, Set, Tuple, Final, Any
 
-import yaml
 import requests
 import streamlit as st
 from streamlit.errors import Error
 from streamlit.runtime.uploaded_file_manager import UploadedFile
 
+from backend.provisioning import load_yaml_items, run_bounded, show_status_table
+
 @dataclasses.dataclass
 class MyPrompt:
     name: str
     template: str
     input_types: Dict[str, Union[str, Dict]]
 
-def list_prompts():
-    response: requests.Response = requests.get(
-        url="http://r2r:7272/v3/prompts",
-        headers={
-            "Authorization": f"Bearer {st.session_state['bearer_token']}",
-        },
-        timeout=5
+# Placeholders filled in by `submit_query` in `backend/chat.py`
+RAG_PLACEHOLDERS: Final[Set[str]] = {"context", "query"}
+
+MAX_CONCURRENT_CREATES: Final[int] = 4
+
+# How long the registry is considered fresh before the prompt listing is diffed again
+REGISTRY_REFRESH_SECONDS: Final[int] = 30
+
+@dataclasses.dataclass
+class RegisteredPrompt:
+    id: str
+    name: str
+    template: str
+    input_types: Dict[str, Union[str, Dict]]
+    created_at: str
+    updated_at: str
+    # Validated once, when the prompt is loaded into the registry
+    is_rag_template: bool
+
+class PromptRegistry:
+    """
+    Process-wide cache of the prompts stored in `r2r`, keyed by name.
+    Entries are only replaced if their `updated_at` changed since the last refresh.
+    """
+
+    def __init__(self):
+        self._prompts: Dict[str, RegisteredPrompt] = {}
+        self._refreshed_at: float = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._refreshed_at = 0.0
+
+    def prompts(self, bearer_token: str, force: bool = False) -> List[RegisteredPrompt]:
+        with self._lock:
+            if force or time.monotonic() - self._refreshed_at > REGISTRY_REFRESH_SECONDS:
+                self._refresh(bearer_token)
+            return list(self._prompts.values())
+
+    def get(self, name: str, bearer_token: str) -> Union[RegisteredPrompt, None]:
+        prompts: Dict[str, RegisteredPrompt] = {p.name: p for p in self.prompts(bearer_token)}
+        if name in prompts:
+            return prompts[name]
+
+        # The prompt might have been created since the last refresh
+        prompts = {p.name: p for p in self.prompts(bearer_token, force=True)}
+        return prompts.get(name)
+
+    def _refresh(self, bearer_token: str):
+        response: requests.Response = requests.get(
+            url="http://r2r:7272/v3/prompts",
+            headers={
+                "Authorization": f"Bearer {bearer_token}",
+            },
+            timeout=5
+        )
+
+        if response.status_code != 200:
+            raise requests.HTTPError(
+                f"Failed to retrieve prompts: {response.status_code} - {response.text}",
+                response=response
+            )
+
+        listed: Dict[str, Dict] = {p['name']: p for p in response.json().get("results", [])}
+
+        for name, prompt in listed.items():
+            cached: Union[RegisteredPrompt, None] = self._prompts.get(name)
+            if cached is None or cached.updated_at != prompt['updated_at']:
+                self._prompts[name] = RegisteredPrompt(
+                    id=prompt['id'],
+                    name=name,
+                    template=prompt['template'],
+                    input_types=prompt['input_types'],
+                    created_at=prompt['created_at'],
+                    updated_at=prompt['updated_at'],
+                    is_rag_template=not _validate_rag_template(prompt['template'])
+                )
+
+        for name in set(self._prompts) - set(listed):
+            del self._prompts[name]
+
+        self._refreshed_at = time.monotonic()
+
+@st.cache_resource
+def prompt_registry() -> PromptRegistry:
+    return PromptRegistry()
+
+def _validate_rag_template(template: str) -> List[str]:
+    """
+    Returns the problems that would prevent the template from being used for RAG.
+    It must contain the `{context}` and `{query}` placeholders and no other ones.
+    """
+    try:
+        fields: Set[str] = {
+            field for _, field, _, _ in string.Formatter().parse(template) if field
+        }
+    except ValueError as ve:
+        return [f"Invalid template: {str(ve)}"]
+
+    problems: List[str] = [
+        f"Missing placeholder: {{{field}}}" for field in sorted(RAG_PLACEHOLDERS - fields)
+    ]
+    problems.extend(
+        f"Unknown placeholder: {{{field}}}" for field in sorted(fields - RAG_PLACEHOLDERS)
     )
+    return problems
 
-    if response.status_code != 200:
-        st.error(f"Failed to retrieve prompts: {response.status_code} - {response.text}")
+def list_prompts():
+    try:
+        prompts: List[RegisteredPrompt] = prompt_registry().prompts(
+            st.session_state['bearer_token']
+        )
+    except requests.HTTPError as e:
+        st.error(str(e))
         return
 
-    prompts: List[Dict] = response.json().get("results", [])
-
     if not prompts:
         st.info("No prompts found.")
         return
@@ -43,51 +148,107 @@ def list_prompts():
     st.subheader("Available Prompts")
 
     for prompt in prompts:
-        with st.expander(label=f"📝 {prompt['name']}", expanded=False):
-            st.markdown(f"**ID**: `{prompt['id']}`")
-            input_types_str: str = ', '.join(f'{k}: {v}' for k, v in prompt['input_types'].items())
+        with st.expander(label=f"📝 {prompt.name}", expanded=False):
+            st.markdown(f"**ID**: `{prompt.id}`")
+            input_types_str: str = ', '.join(f'{k}: {v}' for k, v in prompt.input_types.items())
             st.markdown(f"**Input Types**: `{input_types_str if input_types_str else 'None'}`")
 
             # Format timestamps
-            created = datetime.fromisoformat(prompt['created_at'].replace("Z", "+00:00"))
-            updated = datetime.fromisoformat(prompt['updated_at'].replace("Z", "+00:00"))
+            created = datetime.fromisoformat(prompt.created_at.replace("Z", "+00:00"))
+            updated = datetime.fromisoformat(prompt.updated_at.replace("Z", "+00:00"))
 
             st.markdown(f"**Created**: {created.strftime('%Y-%m-%d %H:%M:%S')} UTC")
             st.markdown(f"**Updated**: {updated.strftime('%Y-%m-%d %H:%M:%S')} UTC")
+            st.markdown(f"**Usable for RAG**: `{'Yes' if prompt.is_rag_template else 'No'}`")
 
             st.markdown("**Template:**")
-            st.code(prompt['template'], language="jinja2", line_numbers=True)
+            st.code(prompt.template, language="jinja2", line_numbers=True)
 
             delete_doc_btn = st.button(
                 label="❌ Delete Prompt",
-                key=f"delete_{prompt['id']}",
+                key=f"delete_{prompt.id}",
                 on_click=delete_prompt,
-                args=(prompt['name'], )
+                args=(prompt.name, )
             )
 
     st.info("You've reached the end of the prompts.")
 
-def create_prompt(file: UploadedFile):
-    temp_file = tempfile.NamedTemporaryFile(delete=True, suffix=".yaml")
-    temp_file.write(file.getbuffer())
-    temp_file.flush()
-
+def create_prompt(file: UploadedFile, dry_run: bool = False):
+    """
+    Creates every prompt defined in the uploaded YAML file.
+    All prompts are validated first, nothing is created if any of them is invalid.
+    With `dry_run` only the validation takes place.
+    """
     try:
-        prompt_obj: MyPrompt = _load_prompt_from_yaml(temp_file.name)
+        items: List[Tuple[str, Any]] = load_yaml_items(file)
+        existing: Set[str] = {
+            p.name for p in prompt_registry().prompts(st.session_state['bearer_token'], force=True)
+        }
+    except ValueError as ve:
+        st.error(f"Error creating prompt: {str(ve)}")
+        return
+    except Exception as exc:
+        st.error(f"Unexpected error: {str(exc)}")
+        return
 
-        if not prompt_obj:
-            st.error("Error loading prompt from YAML file.")
-            return
+    prompts: List[MyPrompt] = []
+    rows: List[Dict[str, str]] = []
+    for name, definition in items:
+        try:
+            prompt_obj: MyPrompt = _parse_prompt(name, definition)
+        except ValueError as ve:
+            rows.append({"Name": str(name), "Status": "invalid", "Detail": str(ve)})
+            continue
+
+        if prompt_obj.name in existing:
+            rows.append({"Name": prompt_obj.name, "Status": "invalid", "Detail": "Already exists"})
+            continue
+
+        problems: List[str] = _validate_rag_template(prompt_obj.template)
+        rows.append({
+            "Name": prompt_obj.name,
+            "Status": "valid",
+            "Detail": f"Not usable for RAG: {', '.join(problems)}" if problems else ""
+        })
+        prompts.append(prompt_obj)
+
+    if dry_run or len(prompts) != len(items):
+        show_status_table(rows)
+        if len(prompts) != len(items):
+            st.error("Nothing was created, fix the invalid prompts first.")
+        else:
+            st.success(f"All {len(prompts)} prompts are valid.")
+        return
 
-        if _check_prompt_exists(prompt_obj.name):
-            st.error(f"Prompt with name {prompt_obj.name} already exists!")
-            return
+    bearer_token: str = st.session_state['bearer_token']
+    errors: List[Union[str, None]] = run_bounded(
+        lambda prompt_obj: _send_create_prompt(prompt_obj, bearer_token),
+        prompts,
+        MAX_CONCURRENT_CREATES
+    )
+    prompt_registry().invalidate()
 
+    for row, error in zip(rows, errors):
+        row["Status"] = "failed" if error else "created"
+        row["Detail"] = error or row["Detail"]
+
+    show_status_table(rows)
+    failed: int = sum(1 for error in errors if error)
+    if failed:
+        st.error(f"Failed to create {failed} of {len(prompts)} prompts.")
+    else:
+        st.success(f"Created {len(prompts)} prompts.")
+
+def _send_create_prompt(prompt_obj: MyPrompt, bearer_token: str) -> Union[str, None]:
+    """
+    Runs in a worker thread. Returns the error or None on success.
+    """
+    try:
         response: requests.Response = requests.post(
             url="http://r2r:7272/v3/prompts",
             headers={
                 "Content-Type": "application/json",
-                "Authorization": f"Bearer {st.session_state['bearer_token']}"
+                "Authorization": f"Bearer {bearer_token}"
             },
             json={
                 "name": prompt_obj.name,
@@ -96,20 +257,13 @@ def create_prompt(file: UploadedFile):
             },
             timeout=5
         )
+    except requests.RequestException as e:
+        return str(e)
 
-        if response.status_code != 200:
-            st.error(f"Failed to retrieve prompts: {response.status_code} - {response.text}")
-            return
+    if response.status_code != 200:
+        return f"{response.status_code} - {response.text}"
 
-        st.success(response.json()['results']['message'])
-    except ValueError as ve:
-        st.error(f"Error creating prompt: {str(ve)}")
-    except Error as e:
-        st.error(f"Unexpected streamlit error: {str(e)}")
-    except Exception as exc:
-        st.error(f"Unexpected error: {str(exc)}")
-    finally:
-        temp_file.close()
+    return None
 
 def delete_prompt(name: str):
     try:
@@ -125,70 +279,38 @@ def delete_prompt(name: str):
             st.error(f"Failed to delete prompt: {response.status_code} - {response.text}")
             return
 
+        prompt_registry().invalidate()
         st.success(f"Prompt '{name}' deleted successfully.")
     except Error as e:
         st.error(f"Unexpected streamlit error: {str(e)}")
     except Exception as exc:
         st.error(f"Unexpected error: {str(exc)}")
 
-def _load_prompt_from_yaml(filepath: str) -> Union[MyPrompt,None]:
+def _parse_prompt(name: str, prompt_data: Any) -> MyPrompt:
     """
-    Loads a prompt from a YAML file.
+    Builds a prompt from a single top-level key of the YAML file.
 
-    The YAML file should contain a single top-level key that represents the prompt name.
-    The value should be a dictionary containing a 'template' key for the prompt template,
-    and an 'input_types' key that is a dictionary mapping input names to input types.
+    The key represents the prompt name. The value should be a dictionary containing a 'template'
+    key for the prompt template, and an 'input_types' key that is a dictionary mapping
+    input names to input types.
 
     Args:
-        filepath (str): The path to the YAML file containing the prompt data.
+        name (str): The top-level key.
+        prompt_data (Any): The value of the top-level key - template and input types.
 
     Returns:
-        MyPrompt or None: Instance containing the name, template, and input types.
+        MyPrompt: Instance containing the name, template, and input types.
 
     Raises:
-        ValueError: If the YAML file is invalid.
-        Exception: If an unexpected error occurs.
+        ValueError: If the definition is invalid.
     """
-    try:
-        with open(file=filepath, mode='r', encoding='utf-8') as f:
-            data: Any = yaml.safe_load(f)
+    if not isinstance(prompt_data, Dict) or 'template' not in prompt_data or 'input_types' not in prompt_data:
+        raise ValueError("The top-level key must contain 'template' and 'input_types'!")
 
-        # There should be exactly one top-level key that represents the prompt name.
-        if not isinstance(data, Dict) or len(data.keys()) != 1:
-            raise ValueError(
-                "YAML file must contain exactly one top-level key representing the prompt name!"
-            )
-
-        name: str = list(data.keys())[0]
-        prompt_data: Any = data[name] # Template and input types
-
-        if 'template' not in prompt_data or 'input_types' not in prompt_data:
-            raise ValueError("The top-level key must contain 'template' and 'input_types'!")
-
-        template: str = prompt_data['template']
-        input_types: str = prompt_data['input_types']
-
-        if not name or not template or not input_types:
-            raise ValueError("YAML file must contain 'name', 'template', and 'input_types'.")
-
-        return MyPrompt(name, template, input_types)
-    except Error as e:
-        st.error(f"Unexpected error: {str(e)}")
-        return None
-    except Exception as exc:
-        st.error(f"Unexpected error: {str(exc)}")
-        return None
-
-def _check_prompt_exists(name: str) -> bool:
-    response: requests.Response = requests.post(
-        url=f"http://r2r:7272/v3/prompts/{name}",
-        headers={
-            "Authorization": f"Bearer {st.session_state['bearer_token']}"
-        },
-        timeout=5
-    )
+    template: str = prompt_data['template']
+    input_types: Dict = prompt_data['input_types']
 
-    if response.status_code == 200:
-        return True
+    if not name or not template or not input_types:
+        raise ValueError("YAML file must contain 'name', 'template', and 'input_types'.")
 
-    return False
+    return MyPrompt(str(name), template, input_types)
@@ -0,0 +1,75 @@
+# pylint: disable=C0114
+# pylint: disable=C0116
+# pylint: disable=C0301
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Tuple, TypeVar, Any
+
+import yaml
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.uploaded_file_manager import UploadedFile
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+def load_yaml_items(file: UploadedFile) -> List[Tuple[str, Any]]:
+    """
+    Parses an uploaded YAML file directly from its buffer.
+
+    The file may contain several documents (separated by `---`) and every document
+    may contain several top-level keys. Each top-level key is one item (prompt or index),
+    the key being its name.
+
+    Returns:
+        List of (name, definition) pairs in the order of the file.
+
+    Raises:
+        ValueError: If the YAML is malformed, a document is not a mapping or a name repeats.
+    """
+    try:
+        documents: List[Any] = list(yaml.safe_load_all(file.getvalue().decode("utf-8")))
+    except yaml.YAMLError as e:
+        raise ValueError(f"Invalid YAML: {str(e)}") from e
+
+    items: List[Tuple[str, Any]] = []
+    seen: set = set()
+    for i, document in enumerate(documents, 1):
+        if document is None: # Empty document, e.g. a trailing `---`
+            continue
+
+        if not isinstance(document, Dict):
+            raise ValueError(f"YAML document {i} must map names to definitions!")
+
+        for name, definition in document.items():
+            if name in seen:
+                raise ValueError(f"Name '{name}' is defined more than once!")
+            seen.add(name)
+            items.append((name, definition))
+
+    if not items:
+        raise ValueError("YAML file doesn't define anything!")
+
+    return items
+
+def run_bounded(task: Callable[[T], R], items: List[T], max_workers: int) -> List[R]:
+    """
+    Runs `task` for every item with at most `max_workers` at a time.
+    The results keep the order of the items. `task` runs in worker threads,
+    so it must neither render anything nor access the session state.
+    """
+    if not items:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(task, items))
+
+def show_status_table(rows: List[Dict[str, str]]):
+    """
+    Renders one row per item with its `Name`, `Status` and `Detail`.
+    """
+    st.dataframe(
+        data=pd.DataFrame(rows, columns=["Name", "Status", "Detail"]),
+        hide_index=True,
+        use_container_width=True
+    )
@@ -0,0 +1,218 @@
+# pylint: disable=C0114
+# pylint: disable=C0116
+# pylint: disable=C0301
+# pylint: disable=W0718
+
+import time
+import queue
+import asyncio
+import threading
+import dataclasses
+from urllib.parse import urlparse
+from typing import Dict, List, Iterator, AsyncIterator, Union, Final
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+from langchain.docstore.document import Document
+
+# Status codes worth another attempt, everything else >= 400 fails right away
+RETRY_STATUS_CODES: Final[frozenset] = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+USER_AGENT: Final[str] = "Mozilla/5.0 (compatible; r2r-webscrape)"
+
+@dataclasses.dataclass(frozen=True)
+class ScrapeSettings:
+    max_concurrency: int = 16          # Requests in flight over all hosts
+    per_host_concurrency: int = 2      # Requests in flight per host
+    per_host_delay_seconds: float = 1.0 # Minimum time between two requests to the same host
+    timeout_seconds: float = 20.0
+    retries: int = 2
+    backoff_seconds: float = 2.0       # Doubled with every retry, unless the host sends `Retry-After`
+
+@dataclasses.dataclass
+class ScrapeResult:
+    url: str
+    document: Union[Document, None] = None
+    error: Union[str, None] = None
+    attempts: int = 0
+    # The page didn't change since the validators sent along (304)
+    not_modified: bool = False
+    etag: Union[str, None] = None
+    last_modified: Union[str, None] = None
+
+class _HostGate:
+    """
+    Limits the concurrency of a single host and spaces out the requests to it.
+    """
+
+    def __init__(self, concurrency: int, delay_seconds: float):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.delay_seconds: float = delay_seconds
+        self._lock = asyncio.Lock()
+        self._next_request_at: float = 0.0
+
+    async def wait_turn(self):
+        async with self._lock:
+            now: float = time.monotonic()
+            if self._next_request_at > now:
+                await asyncio.sleep(self._next_request_at - now)
+            self._next_request_at = time.monotonic() + self.delay_seconds
+
+    def push_back(self, seconds: float):
+        # The host asked us to slow down, applies to every pending request of that host
+        self._next_request_at = max(self._next_request_at, time.monotonic() + seconds)
+
+class PoliteScraper:
+    """
+    Fetches web pages concurrently without overloading any single host.
+    The state of a run (connections, per-host gates) lives only as long as `ascrape`.
+    """
+
+    def __init__(self, settings: ScrapeSettings):
+        self.settings: ScrapeSettings = settings
+
+    async def ascrape(
+        self,
+        urls: List[str],
+        validators: Union[Dict[str, Dict[str, str]], None] = None
+    ) -> AsyncIterator[ScrapeResult]:
+        """
+        Yields the pages in the order they finish, not in the order of `urls`.
+        `validators` maps a URL to the conditional headers of its request
+        (`If-None-Match`, `If-Modified-Since`), an unchanged page comes back as `not_modified`.
+        """
+        validators = validators or {}
+        settings: ScrapeSettings = self.settings
+        global_limit = asyncio.Semaphore(settings.max_concurrency)
+        gates: Dict[str, _HostGate] = {}
+        timeout = aiohttp.ClientTimeout(total=settings.timeout_seconds)
+        connector = aiohttp.TCPConnector(
+            limit=settings.max_concurrency,
+            limit_per_host=settings.per_host_concurrency
+        )
+
+        async with aiohttp.ClientSession(
+            timeout=timeout,
+            connector=connector,
+            headers={"User-Agent": USER_AGENT}
+        ) as session:
+            async def fetch(url: str) -> ScrapeResult:
+                host: str = urlparse(url).netloc.lower()
+                if host not in gates:
+                    gates[host] = _HostGate(settings.per_host_concurrency, settings.per_host_delay_seconds)
+                return await self._fetch(session, gates[host], global_limit, url, validators.get(url, {}))
+
+            tasks = [asyncio.create_task(fetch(url)) for url in urls]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    yield await next_done
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+    async def _fetch(
+        self,
+        session: aiohttp.ClientSession,
+        gate: _HostGate,
+        global_limit: asyncio.Semaphore,
+        url: str,
+        headers: Dict[str, str]
+    ) -> ScrapeResult:
+        result = ScrapeResult(url=url)
+        # The host slot is taken first, so a request waiting for its host doesn't block others
+        async with gate.semaphore:
+            for attempt in range(self.settings.retries + 1):
+                result.attempts = attempt + 1
+                await gate.wait_turn()
+                retry_after: float = self.settings.backoff_seconds * 2 ** attempt
+                try:
+                    async with global_limit:
+                        async with session.get(url, headers=headers) as response:
+                            result.etag = response.headers.get("ETag")
+                            result.last_modified = response.headers.get("Last-Modified")
+                            if response.status == 304:
+                                result.not_modified = True
+                                result.error = None
+                                return result
+
+                            if response.status < 400:
+                                html: str = await response.text(errors="replace")
+                                result.document = _to_document(url, html)
+                                result.error = None
+                                return result
+
+                            result.error = f"HTTP {response.status}"
+                            if response.status not in RETRY_STATUS_CODES:
+                                return result
+                            header: Union[str, None] = response.headers.get("Retry-After")
+                            if header and header.isdigit():
+                                retry_after = float(header)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    result.error = str(e) or type(e).__name__
+
+                if attempt < self.settings.retries:
+                    gate.push_back(retry_after)
+        return result
+
+def _to_document(url: str, html: str) -> Document:
+    # Same metadata as the `AsyncHtmlLoader` of langchain
+    soup = BeautifulSoup(html, features="lxml")
+    metadata: Dict[str, str] = {"source": url}
+    if soup.title and soup.title.string:
+        metadata["title"] = soup.title.string.strip()
+    description = soup.find("meta", attrs={"name": "description"})
+    if description and description.get("content"):
+        metadata["description"] = description.get("content")
+    html_tag = soup.find("html")
+    if html_tag and html_tag.get("lang"):
+        metadata["language"] = html_tag.get("lang")
+    return Document(page_content=html, metadata=metadata)
+
+def iter_scrape(
+    scraper: PoliteScraper,
+    urls: List[str],
+    validators: Union[Dict[str, Dict[str, str]], None] = None
+) -> Iterator[ScrapeResult]:
+    """
+    Synchronous view of `PoliteScraper.ascrape`. The event loop runs in a separate thread,
+    so every page can be processed (e.g. ingested) while the remaining ones are fetched.
+
+    Raises:
+        RuntimeError: If the scraper itself crashed, after the results fetched until then.
+    """
+    results: queue.Queue = queue.Queue(maxsize=scraper.settings.max_concurrency)
+    done = object()
+    stop = threading.Event()
+    crashes: List[Exception] = []
+
+    async def produce():
+        async for result in scraper.ascrape(urls, validators):
+            if stop.is_set():
+                return
+            # Blocks the loop while the consumer is behind, which bounds the memory
+            await asyncio.to_thread(results.put, result)
+
+    def run():
+        try:
+            asyncio.run(produce())
+        except Exception as e:
+            crashes.append(e)
+        finally:
+            results.put(done)
+
+    thread = threading.Thread(target=run, name="webscrape", daemon=True)
+    thread.start()
+    try:
+        while (item := results.get()) is not done:
+            yield item
+        if crashes:
+            raise RuntimeError(f"Scraper stopped: {str(crashes[0])}") from crashes[0]
+    finally:
+        stop.set()
+        # Unblock a producer waiting for a free slot
+        while thread.is_alive():
+            try:
+                results.get(timeout=0.1)
+            except queue.Empty:
+                pass
@@ -10,14 +10,15 @@
 # pylint: disable=W0719
 
 import os
+import json
 import time
-import asyncio
 import hashlib
-import tempfile
 import mimetypes
+import threading
+import dataclasses
 from datetime import datetime
 from urllib.parse import urlparse
-from typing import List, Dict, Union, Any
+from typing import List, Dict, Iterator, Tuple, Callable, Union, Any
 
 import requests
 import pandas as pd
@@ -27,20 +28,58 @@ import streamlit as st
 from streamlit.runtime.uploaded_file_manager import UploadedFile
 
 from langchain.docstore.document import Document
-from langchain_community.document_loaders import AsyncHtmlLoader
 
-@st.cache_resource
-def ollama_client():
-    return Client(host=st.session_state['ollama_api_base'])
-
-@st.cache_resource
-def ollama_options():
+from backend.partitioning import select_strategy, ingestion_config_for
+from backend.normalization import NormalizationResult, is_normalizable, normalize
+from backend.scraper import ScrapeSettings, ScrapeResult, PoliteScraper, iter_scrape
+from backend.fetch_state import FetchState, content_hash, load_fetch_states, save_fetch_state
+from backend.document_update import update_document, fetch_all_chunks, delete_extension
+from backend.partition_cache import PartitionCache, request_config, partition_remote
+from backend.chunking_collections import (
+    scoped_document_id,
+    in_collection,
+    forget_chunking_collections,
+    chunking_collection_name,
+    ensure_chunking_collection,
+    unassigned_documents,
+    add_to_collection
+)
+from backend.urls import UrlSet, url_key, dedupe_urls
+from backend.system import fetch_system_settings
+from backend.near_duplicates import DEFAULT_THRESHOLD, MinHashLSH, DuplicateReport, find_duplicate_clusters, drop_near_duplicates
+from backend.jobs import Job, JobReporter, Reporter, enqueue_job, register_job_handler
+
+# Both caches are keyed by their arguments, so sessions with identical settings
+# share one client, while a changed setting gets its own entry.
+# `max_entries` evicts the least recently used entries.
+@st.cache_resource(max_entries=8)
+def ollama_client(host: str) -> Client:
+    return Client(host=host)
+
+@st.cache_resource(max_entries=32)
+def ollama_options(
+    temperature: float,
+    top_p: float,
+    top_k: int,
+    num_ctx: int
+) -> Options:
     return Options(
+        temperature=temperature,
+        top_p=top_p,
+        top_k=top_k,
+        num_ctx=num_ctx,
+        format="json", # This should be json to enforce proper output if required
+    )
+
+def _session_ollama_client() -> Client:
+    return ollama_client(host=st.session_state['ollama_api_base'])
+
+def _session_ollama_options() -> Options:
+    return ollama_options(
         temperature=st.session_state['temperature'],
         top_p=st.session_state['top_p'],
         top_k=st.session_state['top_k'],
-        num_ctx=st.session_state["context_window_size"],
-        format="json", # This should be json to enforce proper output if required
+        num_ctx=st.session_state["context_window_size"]
     )
 
 @st.cache_resource
@@ -74,18 +113,78 @@ def ollama_tools() -> List[Dict[str, Union[str, Dict]]]:
         }
     ]
 
-@st.cache_resource
-def ascrapper(urls: List[str]):
-    return AsyncHtmlLoader(
-        web_path=urls,
-        default_parser="lxml"
-    )
+@dataclasses.dataclass(frozen=True)
+class IngestionTarget:
+    """
+    The token to ingest with and the collection to ingest into. Passed explicitly,
+    so that ingestion also runs in background jobs, outside of a browser session.
+    Jobs pass a function instead of the token, see `Job.token`.
+    """
+    token: Union[str, Callable[[], str]]
+    collection_id: str
+
+    @property
+    def bearer_token(self) -> str:
+        return self.token() if callable(self.token) else self.token
+
+def _session_target() -> IngestionTarget:
+    return IngestionTarget(st.session_state['bearer_token'], st.session_state['collection_id'])
+
+# Keyed by the settings instead of the URLs, so the number of scrapers stays bounded
+@st.cache_resource(max_entries=4)
+def ascrapper(settings: ScrapeSettings) -> PoliteScraper:
+    return PoliteScraper(settings)
+
+# One index of the chunks of a collection, built on the first ingestion that skips near-duplicates.
+# Ingested chunks are added to it. Deleting or updating documents clears it, since its
+# representatives could otherwise point at chunks that no longer exist.
+# The index is shared by all sessions and the job worker, `_chunk_index_lock` guards every use of it.
+_chunk_index_lock = threading.Lock()
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def collection_chunk_index(collection_id: str, threshold: float, _bearer_token: str) -> MinHashLSH:
+    lsh: MinHashLSH = MinHashLSH(threshold)
+    for chunk in _iter_collection_chunks(collection_id, _bearer_token):
+        lsh.add_if_new(chunk['id'], chunk['text'])
+    return lsh
+
+def _iter_collection_chunks(collection_id: str, bearer_token: str) -> Iterator[Dict[str, str]]:
+    """
+    Chunks of every document of the collection, one document at a time.
+    """
+    offset: int = 0
+    while True:
+        response: requests.Response = requests.get(
+            url=f"http://r2r:7272/v3/collections/{collection_id}/documents",
+            headers={
+                "Authorization": f"Bearer {bearer_token}"
+            },
+            params={
+                "offset": offset,
+                "limit": 100
+            },
+            timeout=30
+        )
+
+        if response.status_code != 200:
+            raise requests.HTTPError(
+                f"Failed to fetch documents: {response.status_code} - {response.text}",
+                response=response
+            )
 
-def _retrieve_documents():
+        page: List[Dict[str, Any]] = response.json()['results']
+        for doc in page:
+            yield from fetch_all_chunks(doc['id'], bearer_token)
+
+        if len(page) < 100:
+            return
+        offset += 100
+
+def _list_documents(bearer_token: str) -> List[Dict]:
     response: requests.Response = requests.get(
         url="http://r2r:7272/v3/documents",
         headers={
-            "Authorization": f"Bearer {st.session_state['bearer_token']}"
+            "Authorization": f"Bearer {bearer_token}"
         },
         params={
             "limit": 1000 # Max documents
@@ -94,17 +193,78 @@ def _retrieve_documents():
     )
 
     if response.status_code != 200:
-        st.error(f"Failed to fetch documents: {response.status_code} - {response.text}")
-        return []
+        raise requests.HTTPError(
+            f"Failed to fetch documents: {response.status_code} - {response.text}",
+            response=response
+        )
 
-    documents: List[Dict] = response.json()['results']
-    return documents
+    return response.json()['results']
+
+def _retrieve_documents():
+    try:
+        return _list_documents(st.session_state['bearer_token'])
+    except requests.HTTPError as e:
+        st.error(str(e))
+        return []
 
 def delete_all_documents():
-    doc_ids: List[str] = [doc['id'] for doc in _retrieve_documents()]
-    for doc_id in doc_ids:
-        delete_document(doc_id)
-    st.info("Successfully deleted all documents")
+    """
+    Deletes the documents in a background job, see the Jobs page.
+    """
+    job_id: int = enqueue_job("delete_documents", "Delete all documents", {}, total=0)
+    st.info(f"Deletion of all documents queued as job {job_id}.")
+
+@register_job_handler("delete_documents")
+def _delete_documents_job(job: Job, report: JobReporter):
+    doc_ids: List[str] = [doc['id'] for doc in _list_documents(job.token())]
+    report.progress(0, len(doc_ids))
+    deleted: int = 0
+    for i, doc_id in enumerate(doc_ids, 1):
+        # Extensions are part of the listed documents themselves
+        error: Union[str, None] = _delete_document(doc_id, job.token(), with_extensions=False)
+        if error:
+            report.error(error)
+        else:
+            deleted += 1
+        report.progress(i, len(doc_ids))
+
+    if deleted < len(doc_ids):
+        raise ValueError(f"Deleted {deleted} of {len(doc_ids)} documents, see the errors above")
+    report.success(f"Deleted {deleted} documents.")
+
+# Queued once per process, concurrent sessions wait for the first one instead of queueing their own
+@st.cache_resource(show_spinner=False)
+def schedule_backfill(chunk_size: int, chunk_overlap: int) -> int:
+    """
+    Documents ingested before there were chunking collections were chunked with the configuration
+    of the environment. A background job adds them to its collection, see `unassigned_documents`.
+    """
+    return enqueue_job(
+        "backfill_collection",
+        f"Add older documents to {chunking_collection_name(chunk_size, chunk_overlap)}",
+        {"chunk_size": chunk_size, "chunk_overlap": chunk_overlap},
+        total=0
+    )
+
+@register_job_handler("backfill_collection")
+def _backfill_collection_job(job: Job, report: JobReporter):
+    payload: Dict[str, Any] = job.payload
+    collection_id: str = ensure_chunking_collection(payload['chunk_size'], payload['chunk_overlap'], job.token())
+    # Documents added by an earlier, interrupted run are members already and aren't listed again
+    documents: List[Dict[str, Any]] = unassigned_documents(job.token())
+    report.progress(0, len(documents))
+    added: int = 0
+    for i, document in enumerate(documents, 1):
+        try:
+            add_to_collection(collection_id, document['id'], job.token())
+            added += 1
+        except requests.HTTPError as e:
+            report.error(str(e))
+        report.progress(i, len(documents))
+
+    if added < len(documents):
+        raise ValueError(f"Added {added} of {len(documents)} documents, the rest is retried on the next start")
+    report.success(f"Added {added} documents to the collection.")
 
 def fetch_documents():
     documents: List[Dict] = _retrieve_documents()
@@ -132,19 +292,36 @@ Created at: `{datetime.fromisoformat(doc['created_at'])}`
 
     st.info("You've reached the end of the documents.")
 
-def delete_document(document_id: str):
+def _delete_document(document_id: str, bearer_token: str, with_extensions: bool = True) -> Union[str, None]:
+    """
+    Usable outside of a session, returns the error if the deletion failed.
+    With `with_extensions` the document holding the chunks updates added to it is deleted as well.
+    """
     response: requests.Response = requests.delete(
         url=f"http://r2r:7272/v3/documents/{document_id}",
         headers={
-            "Authorization": f"Bearer {st.session_state['bearer_token']}"
+            "Authorization": f"Bearer {bearer_token}"
         },
         timeout=5
     )
-    
+
     if response.status_code != 200:
-        st.error(f"Failed to delete document: {response.status_code} - {response.text}")
+        return f"Failed to delete document: {response.status_code} - {response.text}"
+
+    collection_chunk_index.clear()
+    if with_extensions:
+        try:
+            delete_extension(document_id, bearer_token)
+        except requests.HTTPError as e:
+            return str(e)
+    return None
+
+def delete_document(document_id: str):
+    error: Union[str, None] = _delete_document(document_id, st.session_state['bearer_token'])
+    if error:
+        st.error(error)
         return
-    
+
     st.success(f"Successfully deleted document: {document_id}")
 
 def fetch_document_chunks(document_id: str):
@@ -176,59 +353,255 @@ def fetch_document_chunks(document_id: str):
         for k, v in chunk['metadata'].items():
             st.markdown(f"* **{k.upper()}**: `{v}`")
 
-def ingest_file(file: UploadedFile):
-    # First save the file into the tmp folder
-    # R2R receives a filepath so we need to have it
-    # Do it outside because of the finally clause
-    temp_filepath: str = os.path.join(tempfile.gettempdir(), file.name)
+def report_near_duplicates(threshold: float = DEFAULT_THRESHOLD):
+    """
+    Groups the chunks of the current collection into clusters of near-duplicates
+    and estimates what dropping all but one chunk per cluster would save.
+    """
+    try:
+        with st.spinner(text="Scanning chunks...", show_time=True):
+            report: DuplicateReport = find_duplicate_clusters(
+                _iter_collection_chunks(st.session_state['collection_id'], st.session_state['bearer_token']),
+                threshold
+            )
+    except requests.HTTPError as e:
+        st.error(str(e))
+        return
+
+    if not report.clusters:
+        st.info(f"No near-duplicates among {report.total_chunks:,} chunks.")
+        return
+
     try:
-        # Step 1: Check if file was already ingested
-        documents: List[Dict] = _retrieve_documents()     
-        for doc in documents:
-            if doc['title'] == file.name:
-                st.error("File already exists!")
-                return
-
-        # Step 2: Save uploaded file to disk
-        with open(file=temp_filepath, mode="wb") as temp_file:
-            temp_file.write(file.getbuffer())
-            temp_file.flush()
-
-        if not os.path.exists(temp_filepath) or os.path.getsize(temp_filepath) == 0:
-            st.error("Failed to save file or file is empty!")
+        dimension: int = int(fetch_system_settings()['embedding']['base_dimension'])
+    except (requests.RequestException, KeyError):
+        dimension = 1024
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Chunks", f"{report.total_chunks:,}")
+    col2.metric("Near-duplicates", f"{report.duplicate_chunks:,}", f"{len(report.clusters):,} clusters", delta_color="off")
+    col3.metric("Estimated savings", f"{report.estimated_savings(dimension) / 1024 ** 2:,.1f} MiB")
+
+    st.dataframe(
+        pd.DataFrame([
+            {
+                "size": cluster.size,
+                "representative": cluster.representative_id,
+                "text": cluster.representative_text[:200],
+                "duplicates": ", ".join(cluster.duplicate_ids)
+            }
+            for cluster in report.clusters
+        ]),
+        hide_index=True,
+        use_container_width=True
+    )
+
+def ingest_file(
+    file: UploadedFile,
+    strategy: str = "auto",
+    normalize_text: bool = True,
+    update: bool = False,
+    skip_duplicates: bool = False,
+    background: bool = False
+):
+    """
+    `strategy` overrides the partitioning strategy of the ingestion config,
+    with `auto` it's chosen based on the type and content of the file.
+    With `normalize_text` markdown, HTML and plain text files are reduced to their text first.
+    With `update` an already ingested file is updated chunk by chunk instead of being rejected.
+    With `skip_duplicates` chunks that are near-duplicates of chunks in the collection aren't ingested.
+    Updates ignore it, their unchanged chunks are near-duplicates of the ingested version.
+    With `background` the file is ingested by a job, see the Jobs page. Updates always run in the session.
+    """
+    # Step 1: Check if file was already ingested (with the current chunking configuration)
+    collection_id: str = st.session_state['collection_id']
+    documents: List[Dict] = _retrieve_documents()     
+    existing: Union[Dict, None] = next(
+        (doc for doc in documents if doc['title'] == file.name and in_collection(doc, collection_id)),
+        None
+    )
+    if existing is not None and not update:
+        st.error("File already exists!")
+        return
+
+    if existing is not None:
+        content, mime_type, partition_name = _prepare_content(file.getvalue(), file.name, normalize_text, st)
+        if not content:
+            st.error("File is empty!")
             return
+        if strategy == "auto":
+            strategy = select_strategy(mime_type, content)
+        update_document(existing, content, partition_name, ingestion_config_for(strategy))
+        collection_chunk_index.clear()
+        return
 
-        mime_type, _ = mimetypes.guess_type(temp_filepath)
-        if mime_type is None:
-            mime_type = "application/octet-stream"
-
-        # Step 3: Ingest file
-        with open(temp_filepath, "rb") as f:
-            with st.spinner(text="Ingesting document...", show_time=True):
-                response: requests.Response = requests.post(
-                    url="http://r2r:7272/v3/documents",
-                    headers={
-                        "Authorization": f"Bearer {st.session_state['bearer_token']}"
-                    },
-                    files={
-                        "file": (file.name, f, mime_type)
-                    },
-                    json={
-                        "ingestion_mode": "custom",
-                        "ingestion_config": st.session_state['ingestion_config'],
-                    },
-                    timeout=3600 # 1 hour timeout for ingestion 
-                )
-                
-                if response.status_code != 202:
-                    st.error(f"Failed to ingest document: {response.status_code} - {response.text}")
-                    return
-                
-                st.success(response.json()['results']['message'])
-    finally:
-        # Remove temporary file after ingestion
-        if os.path.exists(temp_filepath):
-            os.remove(temp_filepath)
+    # Step 2: Ingest file
+    if background:
+        job_id: int = enqueue_job(
+            "ingest_file",
+            f"Ingest {file.name}",
+            {
+                "filename": file.name,
+                "strategy": strategy,
+                "normalize_text": normalize_text,
+                "skip_duplicates": skip_duplicates,
+                "ingestion_config": st.session_state['ingestion_config'],
+                "collection_id": collection_id
+            },
+            file.getvalue()
+        )
+        st.success(f"Queued as job {job_id}, its progress is shown on the Jobs page.")
+        return
+
+    with st.spinner(text="Ingesting document...", show_time=True):
+        ingest_content(
+            file.getvalue(),
+            file.name,
+            strategy,
+            normalize_text,
+            skip_duplicates,
+            st.session_state['ingestion_config'],
+            _session_target(),
+            st
+        )
+
+@register_job_handler("ingest_file")
+def _ingest_file_job(job: Job, report: JobReporter):
+    payload: Dict[str, Any] = job.payload
+    ingested: bool = ingest_content(
+        job.content,
+        payload['filename'],
+        payload['strategy'],
+        payload['normalize_text'],
+        payload['skip_duplicates'],
+        payload['ingestion_config'],
+        IngestionTarget(job.token, payload['collection_id']),
+        report
+    )
+    if not ingested:
+        raise ValueError(f"Failed to ingest {payload['filename']}")
+    report.progress(1, 1)
+
+def _prepare_content(content: bytes, filename: str, normalize_text: bool, report: Reporter) -> Tuple[bytes, str, str]:
+    """
+    Returns the (normalized) content, its MIME type and the name to partition it under.
+    Normalized content is plain text, `unstructured` picks its partitioner by the file extension,
+    so it's partitioned as a `.txt` file instead of as markdown or HTML.
+    """
+    mime_type, _ = mimetypes.guess_type(filename)
+    if mime_type is None:
+        mime_type = "application/octet-stream"
+
+    if normalize_text and is_normalizable(mime_type):
+        try:
+            result: NormalizationResult = normalize(content.decode("utf-8"), mime_type)
+        except UnicodeDecodeError:
+            report.warning("File isn't valid UTF-8, it will be ingested without normalization.")
+        else:
+            content = result.text.encode("utf-8")
+            report.info(f"Normalization saved {result.saved_bytes:,} of {result.original_bytes:,} bytes.")
+            return content, "text/plain", f"{os.path.splitext(filename)[0]}.txt"
+
+    return content, mime_type, filename
+
+def ingest_content(
+    content: bytes,
+    filename: str,
+    strategy: str,
+    normalize_text: bool,
+    skip_duplicates: bool,
+    ingestion_config: Dict[str, Any],
+    target: IngestionTarget,
+    report: Reporter
+) -> bool:
+    """
+    Ingests the content of a file, messages go to `report`. Returns whether it was ingested.
+    """
+    content, mime_type, partition_name = _prepare_content(content, filename, normalize_text, report)
+    if not content:
+        report.error("File is empty!")
+        return False
+
+    if strategy == "auto":
+        strategy = select_strategy(mime_type, content)
+
+    try:
+        response, cached, skipped = _ingest_chunks(
+            content,
+            filename,
+            ingestion_config_for(strategy, ingestion_config),
+            {"title": filename},
+            target,
+            skip_duplicates,
+            partition_name
+        )
+    except (requests.RequestException, ValueError) as e:
+        report.error(f"Failed to ingest document: {str(e)}")
+        return False
+
+    if response.status_code != 202:
+        report.error(f"Failed to ingest document: {response.status_code} - {response.text}")
+        return False
+
+    partitioned: str = "partitioning cached" if cached else "partitioned"
+    report.success(f"{response.json()['results']['message']} (strategy: `{strategy}`, {partitioned})")
+    if skipped:
+        report.info(f"Skipped {skipped} near-duplicate chunks.")
+    return True
+
+def _ingest_chunks(
+    content: bytes,
+    filename: str,
+    ingestion_config: Dict[str, Any],
+    metadata: Dict[str, Any],
+    target: IngestionTarget,
+    skip_duplicates: bool = False,
+    partition_name: Union[str, None] = None
+) -> Tuple[requests.Response, bool, int]:
+    """
+    Partitions the file through the partition cache and ingests the resulting chunks,
+    so `r2r` only embeds them. Files whose content and chunking settings didn't change since
+    they were last partitioned (by the application or the evaluation notebooks) skip partitioning.
+    `partition_name` overrides the name the partitioner sees, e.g. for normalized content.
+    With `skip_duplicates` near-duplicates of each other or of the collection's chunks are dropped,
+    raises a `ValueError` if nothing is left.
+    Returns the response of `r2r`, whether the chunks came from the cache and the number of dropped chunks.
+    """
+    texts, cached = PartitionCache().chunks(
+        content, partition_name or filename, request_config(ingestion_config), partition_remote
+    )
+
+    skipped: int = 0
+    if skip_duplicates:
+        lsh: MinHashLSH = collection_chunk_index(target.collection_id, DEFAULT_THRESHOLD, target.bearer_token)
+        with _chunk_index_lock:
+            kept: List[str] = [texts[i] for i in drop_near_duplicates(texts, lsh)]
+        skipped = len(texts) - len(kept)
+        texts = kept
+        if not texts:
+            raise ValueError(f"All {skipped} chunks of {filename} are near-duplicates of ingested chunks")
+
+    response: requests.Response = requests.post(
+        url="http://r2r:7272/v3/documents",
+        headers={
+            "Authorization": f"Bearer {target.bearer_token}"
+        },
+        data={
+            "chunks": json.dumps(texts),
+            "id": scoped_document_id(target.collection_id, filename),
+            "collection_ids": json.dumps([target.collection_id]),
+            "metadata": json.dumps(metadata)
+        },
+        timeout=3600 # 1 hour timeout for ingestion 
+    )
+
+    if skip_duplicates and response.status_code != 202:
+        # The index already holds the chunks, which never made it into the collection
+        collection_chunk_index.clear()
+    if response.status_code == 404:
+        # The collection was deleted, the next run looks its id up again
+        forget_chunking_collections()
+    return response, cached, skipped
 
 def perform_websearch(query: str, results_to_return: int) -> tuple[str, List[str]]:
     """
@@ -237,9 +610,9 @@ def perform_websearch(query: str, results_to_return: int) -> tuple[str, List[str
     However, this doesn't use R2R, but simple Ollama with a tool call.
     """
     # Call the model with the properly formatted tools
-    response: Dict[str, Any] = ollama_client().chat(
+    response: Dict[str, Any] = _session_ollama_client().chat(
         model=st.session_state['chat_model'],
-        options=ollama_options(),
+        options=_session_ollama_options(),
         messages=[
             {
                 'role': 'user',
@@ -256,9 +629,9 @@ def perform_websearch(query: str, results_to_return: int) -> tuple[str, List[str
             )
 
             # Continue the conversation with the tool results
-            final_response: Dict[str, Any] = ollama_client().chat(
+            final_response: Dict[str, Any] = _session_ollama_client().chat(
                 model=st.session_state['chat_model'],
-                options=ollama_options(),
+                options=_session_ollama_options(),
                 messages=[
                     {
                         'role': 'user',
@@ -330,74 +703,250 @@ def _langsearch_websearch_tool(query: str, count: int) -> tuple[str, List[str]]:
     else:
         return f"Search API request failed, ({response.status_code}: {response.text})", []
 
-def perform_webscrape(file: UploadedFile):
+def perform_webscrape(
+    file: UploadedFile,
+    strategy: str = "auto",
+    normalize_text: bool = True,
+    scrape_settings: ScrapeSettings = ScrapeSettings(),
+    refresh: bool = False,
+    skip_duplicates: bool = False,
+    background: bool = False
+):
+    """
+    The scraped pages are plain text, so `auto` always results in the `fast` strategy.
+    With `normalize_text` scripts, navigation and other boilerplate are removed from
+    each page right before it's ingested.
+    Pages are ingested as soon as they're fetched, while the remaining ones are still loading.
+
+    Without `refresh` pages that were already ingested are skipped. With `refresh` they're
+    revalidated with conditional requests and only re-ingested if their content changed.
+    With `skip_duplicates` repeated headers, footers and other near-duplicate chunks aren't ingested.
+    With `background` the URLs are scraped by a job, see the Jobs page.
+    """
+    if strategy == "auto":
+        strategy = select_strategy("text/plain", b"")
+    ingestion_config: Dict[str, Any] = ingestion_config_for(strategy)
+
+    try:
+        extracted: List[str] = _extract_urls(file)
+    except ValueError as ve:
+        st.error(f"Error: {str(ve)}")
+        return
+
+    if background:
+        job_id: int = enqueue_job(
+            "webscrape",
+            f"Scrape {len(extracted)} URLs from {file.name}",
+            {
+                "urls": extracted,
+                "ingestion_config": ingestion_config,
+                "normalize_text": normalize_text,
+                "scrape_settings": dataclasses.asdict(scrape_settings),
+                "refresh": refresh,
+                "skip_duplicates": skip_duplicates,
+                "collection_id": st.session_state['collection_id']
+            },
+            total=len(extracted)
+        )
+        st.success(f"Queued as job {job_id}, its progress is shown on the Jobs page.")
+        return
+
     with st.status(
         label="Processing URLs...",
         expanded=True,
         state="running"
     ):
-        try:
-            urls: List[str] = _extract_urls(file)
-            if len(urls) == 0:
-                st.error("No valid URLs found in file")
-                return
-
-            st.write('Extracted URLs...')
-
-            documents: List[Document] = _fetch_data_from_urls(urls)
-            st.write('Fetched data...')
-
-            existing_sources: List[str] = [
-                doc['metadata'].get('source', 'unknown')
-                for doc in _retrieve_documents()
-            ]
-
-            for document in documents:
-                url: str = document.metadata.get('source', 'unknown')
-                source_name: str = _safe_filename_from_url(url)
-                if source_name in existing_sources:
-                    st.warning(f"Document '{source_name}' already exists. Skipping.")
-                    continue
-
-                # Write scraped content to temporary file
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".txt") as temp_file:
-                    temp_file.write(document.page_content.encode("utf-8"))
-                    temp_file.flush()
-                    temp_path = temp_file.name
-
-                mime_type, _ = mimetypes.guess_type(temp_path)
-                if mime_type is None:
-                    mime_type = "text/plain"
-
-                with open(temp_path, "rb") as f:
-                    ingestion_resp = requests.post(
-                        url="http://r2r:7272/v3/documents",
-                        headers={
-                            "Authorization": f"Bearer {st.session_state['bearer_token']}"
-                        },
-                        files={
-                            "file": (f"{source_name}.txt", f, mime_type)
-                        },
-                        json={
-                            "ingestion_mode": "custom",
-                            "ingestion_config": st.session_state['ingestion_config'],
-                            "metadata": document.metadata
-                        },
-                        timeout=3600
-                    )
+        webscrape_urls(
+            extracted,
+            ingestion_config,
+            normalize_text,
+            scrape_settings,
+            refresh,
+            skip_duplicates,
+            _session_target(),
+            st
+        )
+
+@register_job_handler("webscrape")
+def _webscrape_job(job: Job, report: JobReporter):
+    payload: Dict[str, Any] = job.payload
+    webscrape_urls(
+        payload['urls'],
+        payload['ingestion_config'],
+        payload['normalize_text'],
+        ScrapeSettings(**payload['scrape_settings']),
+        payload['refresh'],
+        payload['skip_duplicates'],
+        IngestionTarget(job.token, payload['collection_id']),
+        report,
+        on_progress=report.progress
+    )
+
+def webscrape_urls(
+    extracted: List[str],
+    ingestion_config: Dict[str, Any],
+    normalize_text: bool,
+    scrape_settings: ScrapeSettings,
+    refresh: bool,
+    skip_duplicates: bool,
+    target: IngestionTarget,
+    report: Reporter,
+    on_progress: Union[Callable[[int, int], None], None] = None
+):
+    """
+    Scrapes and ingests the URLs, see `perform_webscrape`. Messages go to `report`,
+    `on_progress` receives the number of processed and of total URLs.
+    """
+    try:
+        existing: Dict[str, str] = _existing_pages(target)
+    except requests.HTTPError as e:
+        report.error(str(e))
+        return
+
+    # Pages already in the knowledge base and pages of the CSV share one set,
+    # so neither a duplicate row nor an existing page gets scraped.
+    # When refreshing, existing pages are revalidated instead.
+    seen: UrlSet = UrlSet() if refresh else UrlSet(existing.keys())
+    urls, invalid = _remove_duplicate_urls(extracted, seen)
+    if invalid:
+        report.warning(f"Skipped {len(invalid)} invalid URLs: {', '.join(invalid)}")
+    if len(urls) == 0:
+        report.error("No new URLs found in file")
+        return
 
-                os.remove(temp_path)
-                time.sleep(5) # Wait for ingestion to complete
+    skipped: int = len(extracted) - len(urls) - len(invalid)
+    report.write(f'Extracted {len(urls)} URLs to fetch ({skipped} duplicates or already ingested)...')
 
-                if ingestion_resp.status_code == 202:
-                    st.success(f"✅ Ingested: {source_name}")
-                else:
-                    st.error(f"❌ Failed to ingest {source_name}: {ingestion_resp.status_code}")
-                    st.error(ingestion_resp.text)
+    states: Dict[str, FetchState] = load_fetch_states(_state_key(url, target) for url in urls)
+    validators: Dict[str, Dict[str, str]] = {
+        url: states[_state_key(url, target)].conditional_headers()
+        for url in urls
+        if _state_key(url, target) in states and url_key(url) in existing
+    }
 
-            st.info("🎉 Web scraping and ingestion complete.")
-        except ValueError as ve:
-            st.error(f"Error: {str(ve)}")
+    saved_bytes: int = 0
+    original_bytes: int = 0
+    unchanged: int = 0
+    processed: int = 0
+    for result in _fetch_data_from_urls(urls, scrape_settings, validators, report):
+        processed += 1
+        if on_progress is not None:
+            on_progress(processed, len(urls))
+
+        key: str = url_key(result.url)
+        state: FetchState = states.get(_state_key(result.url, target)) or FetchState(
+            url_key=_state_key(result.url, target),
+            url=result.url
+        )
+        state.etag = result.etag or state.etag
+        state.last_modified = result.last_modified or state.last_modified
+
+        if result.not_modified:
+            unchanged += 1
+            save_fetch_state(state)
+            continue
+
+        document, normalization = _normalize_scraped(result.document, normalize_text)
+        saved_bytes += normalization.saved_bytes
+        original_bytes += normalization.original_bytes
+
+        digest: str = content_hash(document.page_content)
+        old_document_id: Union[str, None] = existing.get(key)
+        if old_document_id and state.content_hash == digest:
+            unchanged += 1
+            save_fetch_state(state)
+            continue
+
+        source_name: str = _safe_filename_from_url(result.url)
+        if old_document_id:
+            # Same name means same document id in `r2r`, so the old one has to go first
+            error: Union[str, None] = _delete_document(old_document_id, target.bearer_token)
+            if error:
+                report.error(error)
+
+        document_id: Union[str, None] = _ingest_scraped(
+            document, source_name, ingestion_config, target, report, skip_duplicates
+        )
+        if document_id is None:
+            continue
+
+        state.content_hash = digest
+        state.document_id = document_id
+        save_fetch_state(state)
+        report.success(f"✅ {'Updated' if old_document_id else 'Ingested'}: {source_name}")
+
+    if on_progress is not None:
+        # Failed fetches aren't yielded, the job is done nonetheless
+        on_progress(len(urls), len(urls))
+    if refresh:
+        report.write(f"{unchanged} pages unchanged.")
+    if normalize_text:
+        report.write(f"Normalization saved {saved_bytes:,} of {original_bytes:,} bytes.")
+    report.info("🎉 Web scraping and ingestion complete.")
+
+def _state_key(url: str, target: IngestionTarget) -> str:
+    # A page has a document (and state) per chunking configuration
+    return f"{target.collection_id}/{url_key(url)}"
+
+def _existing_pages(target: IngestionTarget) -> Dict[str, str]:
+    """
+    Scraped documents of the chunking configuration by the `url_key` of their source.
+    """
+    pages: Dict[str, str] = {}
+    for doc in _list_documents(target.bearer_token):
+        if not in_collection(doc, target.collection_id):
+            continue
+        source: Union[str, None] = doc['metadata'].get('source')
+        try:
+            if source:
+                pages[url_key(source)] = doc['id']
+        except ValueError: # Not a URL, e.g. an uploaded file
+            continue
+    return pages
+
+def _ingest_scraped(
+    document: Document,
+    source_name: str,
+    ingestion_config: Dict[str, Any],
+    target: IngestionTarget,
+    report: Reporter,
+    skip_duplicates: bool = False
+) -> Union[str, None]:
+    """
+    Returns the id of the new document, None if the ingestion failed.
+    """
+    try:
+        ingestion_resp, _, _ = _ingest_chunks(
+            document.page_content.encode("utf-8"),
+            source_name,
+            ingestion_config,
+            {**document.metadata, "title": source_name},
+            target,
+            skip_duplicates
+        )
+    except requests.RequestException as e:
+        report.error(f"❌ Failed to ingest {source_name}: {str(e)}")
+        return None
+    except ValueError as e: # Nothing but near-duplicates
+        report.warning(f"⚠️ Skipped {source_name}: {str(e)}")
+        return None
+
+    time.sleep(5) # Wait for ingestion to complete
+
+    if ingestion_resp.status_code != 202:
+        report.error(f"❌ Failed to ingest {source_name}: {ingestion_resp.status_code}")
+        report.error(ingestion_resp.text)
+        return None
+
+    return ingestion_resp.json()['results']['document_id']
+
+def _normalize_scraped(document: Document, normalize_text: bool) -> Tuple[Document, NormalizationResult]:
+    if normalize_text:
+        result: NormalizationResult = normalize(document.page_content, "text/html")
+        return Document(page_content=result.text, metadata=document.metadata), result
+
+    size: int = len(document.page_content.encode("utf-8"))
+    return document, NormalizationResult(document.page_content, size, size)
 
 def _extract_urls(file: UploadedFile) -> List[str]:
     dataframe = pd.read_csv(
@@ -410,23 +959,35 @@ def _extract_urls(file: UploadedFile) -> List[str]:
         raise ValueError("CSV file is empty!")
 
     extracted_urls: List[str] = dataframe.iloc[0:, 0].dropna().astype(str).str.strip().tolist()
-    extracted_urls: List[str] = _remove_duplicate_urls(extracted_urls)
-    return extracted_urls
-
-def _remove_duplicate_urls(urls: List[str]) -> List[str]:
-    return list(set(urls))
-
-def _fetch_data_from_urls(scrape_urls: List[str]) -> List[Document]:
-    scraper = ascrapper(scrape_urls)
-    web_documents: List[Document] = _run_async_function(scraper.aload())
-    return web_documents
-
-def _run_async_function(coroutine):
-    return asyncio.run(coroutine)
+    return [url for url in extracted_urls if url]
+
+def _remove_duplicate_urls(urls: List[str], seen: UrlSet) -> Tuple[List[str], List[str]]:
+    # Keeps the order of the CSV, compares the canonical form of the URLs but keeps them as given
+    return dedupe_urls(urls, seen)
+
+def _fetch_data_from_urls(
+    scrape_urls: List[str],
+    settings: ScrapeSettings,
+    validators: Dict[str, Dict[str, str]],
+    report: Reporter
+) -> Iterator[ScrapeResult]:
+    """
+    Yields the fetched and the unchanged (`not_modified`) pages, failures are only reported.
+    A crash of the scraper is reported as an error and ends the iteration.
+    """
+    try:
+        for result in iter_scrape(ascrapper(settings), scrape_urls, validators):
+            if result.document is None and not result.not_modified:
+                report.warning(f"Failed to fetch {result.url} after {result.attempts} attempt(s): {result.error}")
+                continue
+            yield result
+    except RuntimeError as e:
+        report.error(f"{str(e)}, the remaining URLs weren't fetched.")
 
 def _safe_filename_from_url(url: str) -> str:
-    parsed = urlparse(url)
-    netloc = parsed.netloc.replace(".", "-")
+    # Derived from the canonical form, the variants of a page get the same name
+    parsed = urlparse(f"//{url_key(url)}")
+    netloc = parsed.netloc.replace(".", "-").replace(":", "-")
     path = parsed.path.strip("/").replace("/", "-")
     if not path:
         path = "index"
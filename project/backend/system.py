@@ -0,0 +1,88 @@
+# pylint: disable=C0114
+# pylint: disable=C0116
+# pylint: disable=C0301
+
+import os
+from typing import Dict, Callable, Any, Final
+
+import requests
+import streamlit as st
+
+# Default credentials of `r2r`, can be modified in `project/backend/config.toml`.
+R2R_USERNAME: Final[str] = os.getenv("R2R_USERNAME", "admin@example.com")
+R2R_PASSWORD: Final[str] = os.getenv("R2R_PASSWORD", "change_me_immediately")
+
+# The settings only change when `r2r` is restarted with a different `config.toml`.
+SETTINGS_TTL_SECONDS: Final[int] = int(os.getenv("R2R_SETTINGS_TTL_SECONDS", "3600"))
+
+# Should stay below the lifetime of the access token issued by `r2r` (1 hour by default).
+# A cached token can be up to this old when it's handed out, so it expires sooner than a fresh one.
+# Sessions therefore take the token from the cache on every run (see `st_app.py`), a run always starts
+# with a token that is valid for at least the lifetime minus this TTL.
+TOKEN_TTL_SECONDS: Final[int] = int(os.getenv("R2R_TOKEN_TTL_SECONDS", "1800"))
+
+# The cached functions are shared by every browser session of the process.
+# A new session therefore doesn't need to contact `r2r` before the first render.
+# Failed requests raise, so that an error never ends up in the cache.
+
+@st.cache_data(ttl=SETTINGS_TTL_SECONDS, show_spinner=False)
+def fetch_system_settings() -> Dict[str, Any]:
+    response: requests.Response = requests.get(
+        url="http://r2r:7272/v3/system/settings",
+        timeout=5
+    )
+
+    if response.status_code != 200:
+        raise requests.HTTPError(
+            f"Failed to fetch system settings: {response.status_code} - {response.text}",
+            response=response
+        )
+
+    return response.json()['results']['config']
+
+def login(username: str, password: str, base_url: str = "http://r2r:7272") -> str:
+    """
+    Uncached login, usable outside of a Streamlit session, e.g. in background threads and scripts.
+    """
+    response: requests.Response = requests.post(
+        url=f"{base_url}/v3/users/login",
+        headers={
+            "Content-Type": "application/x-www-form-urlencoded"
+        },
+        data={
+            "username": username,
+            "password": password
+        },
+        timeout=5
+    )
+
+    if response.status_code != 200:
+        raise requests.HTTPError(
+            f"Failed to login: {response.status_code} - {response.text}",
+            response=response
+        )
+
+    return response.json()['results']['access_token']['token']
+
+@st.cache_data(ttl=TOKEN_TTL_SECONDS, show_spinner=False)
+def fetch_bearer_token(username: str, password: str) -> str:
+    return login(username, password)
+
+def invalidate_bearer_token():
+    fetch_bearer_token.clear()
+
+def send_authorized(send: Callable[[str], requests.Response]) -> requests.Response:
+    """
+    Sends a request with the token of the session. The shared token is rejected (401) e.g. after
+    `r2r` restarted with another secret, it's then replaced for every session and the request is sent once more.
+    """
+    response: requests.Response = send(st.session_state['bearer_token'])
+    if response.status_code != 401:
+        return response
+
+    invalidate_bearer_token()
+    try:
+        st.session_state['bearer_token'] = fetch_bearer_token(R2R_USERNAME, R2R_PASSWORD)
+    except requests.HTTPError:
+        return response
+    return send(st.session_state['bearer_token'])
@@ -0,0 +1,134 @@
+# pylint: disable=C0114
+# pylint: disable=C0116
+# pylint: disable=C0301
+
+import re
+import posixpath
+import ipaddress
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from typing import List, Set, Iterable, Tuple, Final
+
+# Query parameters that only track the visitor and never change the content.
+# `ref` isn't one of them, it selects e.g. the branch of a page on GitHub.
+TRACKING_PARAMETERS: Final[Set[str]] = {
+    "gclid", "dclid", "fbclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "ref_src", "spm"
+}
+TRACKING_PREFIXES: Final[Tuple[str, ...]] = ("utm_", "pk_", "hsa_")
+
+DEFAULT_PORTS: Final[dict] = {"http": 80, "https": 443}
+
+def _is_tracking(parameter: str) -> bool:
+    parameter = parameter.lower()
+    return parameter in TRACKING_PARAMETERS or parameter.startswith(TRACKING_PREFIXES)
+
+def with_scheme(url: str) -> str:
+    """
+    The URL without surrounding whitespace, URLs without a scheme get `https`.
+    """
+    url = url.strip()
+    return url if "://" in url else f"https://{url}"
+
+def _canonical_host(host: str) -> str:
+    # IPv6 addresses are compared in their compressed form and keep their brackets
+    if ":" in host:
+        return f"[{ipaddress.IPv6Address(host).compressed}]"
+    if not re.fullmatch(r"[\w.-]+", host):
+        raise ValueError(f"Invalid host: {host}")
+    return host
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalizes a URL, so that the variants of a page map to the same string:
+    lowercase scheme and host, no default port, no fragment, no tracking parameters,
+    sorted query, no duplicate or trailing slashes (except for the root).
+    URLs without a scheme get `https`, IPv6 hosts keep their brackets.
+
+    Raises:
+        ValueError: If the URL has no valid host.
+    """
+    url = with_scheme(url)
+
+    try:
+        parts = urlsplit(url)
+        scheme: str = parts.scheme.lower()
+        host: str = _canonical_host((parts.hostname or "").rstrip("."))
+        port = parts.port
+    except ValueError as e:
+        raise ValueError(f"Invalid URL: {url}") from e
+
+    netloc: str = host
+    if port and port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{port}"
+
+    path: str = re.sub(r"/{2,}", "/", parts.path)
+    if path:
+        # Resolves `.` and `..` segments, keeps the path absolute
+        path = posixpath.normpath(path)
+    path = "/" if path in ("", "/", ".") else path.rstrip("/")
+
+    query: List[Tuple[str, str]] = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(k)
+    )
+
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+def url_key(url: str) -> str:
+    """
+    Identity of a page: the canonical URL without its scheme,
+    `http` and `https` variants of a page are the same document.
+    """
+    return canonicalize_url(url).split("://", 1)[1]
+
+class UrlSet:
+    """
+    Set of pages by `url_key`. Membership checks and inserts are O(1).
+    """
+
+    def __init__(self, urls: Iterable[str] = ()):
+        self._keys: Set[str] = set()
+        for url in urls:
+            self.add(url)
+
+    def add(self, url: str) -> bool:
+        """
+        Returns False if the page was already in the set or the URL is invalid.
+        """
+        try:
+            key: str = url_key(url)
+        except ValueError:
+            return False
+
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        return True
+
+    def __contains__(self, url: str) -> bool:
+        try:
+            return url_key(url) in self._keys
+        except ValueError:
+            return False
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+def dedupe_urls(urls: Iterable[str], seen: UrlSet) -> Tuple[List[str], List[str]]:
+    """
+    URLs of the pages not in `seen` in their original order, and the invalid URLs.
+    The canonical form is only the key, the URLs are returned as given (see `with_scheme`),
+    so the pages are fetched from the address the user provided.
+    `seen` is updated, so it can be shared with later checks.
+    """
+    unique: List[str] = []
+    invalid: List[str] = []
+    for url in urls:
+        try:
+            url_key(url)
+        except ValueError:
+            invalid.append(url)
+            continue
+
+        if seen.add(url):
+            unique.append(with_scheme(url))
+    return unique, invalid
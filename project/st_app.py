@@ -4,12 +4,23 @@
 
 import os
 import pathlib
-from typing import List, Final
+from typing import List, Dict, Union, Any, Final
 
 import requests
 import streamlit as st
 from streamlit.navigation.page import StreamlitPage
 
+from backend.prompt import RegisteredPrompt, prompt_registry
+from backend.jobs import job_worker
+from backend.index_monitor import index_stats_sampler
+from backend.chunking_collections import ensure_chunking_collection
+from backend.system import (
+    R2R_USERNAME,
+    R2R_PASSWORD,
+    fetch_system_settings,
+    fetch_bearer_token
+)
+
 # This is where the API key will be persisted across application restarts
 KEY_FILE: Final[str] = pathlib.Path(".langsearch_key")
 
@@ -45,6 +56,12 @@ def get_pages() -> List[StreamlitPage]:
             title="Indices",
             url_path="index",
             icon=":material/description:"
+        ),
+        st.Page(
+            page="st_jobs.py",
+            title="Jobs",
+            url_path="jobs",
+            icon=":material/work:"
         )
     ]
 
@@ -92,25 +109,36 @@ if __name__ == "__main__":
     if "messages" not in st.session_state:
         st.session_state['messages'] = []
 
+    # Messages of the conversations loaded in this session, keyed by conversation id
+    # Allows to fetch only the messages that are newer than the cached ones
+    if "conversation_cache" not in st.session_state:
+        st.session_state['conversation_cache'] = {}
+
     # The id of the last message in a given conversation
     if "parent_id" not in st.session_state:
         st.session_state["parent_id"] = None
 
+    # Drop near-duplicate chunks from the retrieved context, see `backend/near_duplicates.py`
+    if "exclude_duplicate_context" not in st.session_state:
+        st.session_state["exclude_duplicate_context"] = False
+
+    # Index builds requested in this session, tracked on the Indices page
+    if "index_builds" not in st.session_state:
+        st.session_state["index_builds"] = {}
+
     # The context window size for a model
     # Due to some ollama having a small context window by default we can expand it
     if "context_window_size" not in st.session_state:
         st.session_state["context_window_size"] = int(os.getenv("LLM_CONTEXT_WINDOW_TOKENS"))
 
     if 'ingestion_config' not in st.session_state:
-        response: requests.Response = requests.get(
-            url="http://r2r:7272/v3/system/settings",
-            timeout=5
-        )
-
-        if response.status_code != 200:
-            st.error(f"Failed to fetch system settings: {response.status_code} - {response.text}")
+        try:
+            # Shared across sessions, see `backend/system.py`
+            system_config: Dict[str, Any] = fetch_system_settings()
+        except requests.HTTPError as e:
+            st.error(str(e))
         else:
-            st.session_state['ingestion_config'] = response.json()['results']['config']['ingestion']
+            st.session_state['ingestion_config'] = system_config['ingestion']
 
             # Since the config is a snapshot not an actual instance of configuration
             # in the application we can save a slighty modified version in the session state.
@@ -138,23 +166,26 @@ if __name__ == "__main__":
 
     # Login values are default ones. Can be modified in the config file at `project/backend/config.toml`.
     # This token is used for authorization when interacting with the endpoints of `r2r`.
-    if "bearer_token" not in st.session_state:
-        response: requests.Response = requests.post(
-            url="http://r2r:7272/v3/users/login",
-            headers={
-                "Content-Type": "application/x-www-form-urlencoded"
-            },
-            data={
-                "username": "admin@example.com",
-                "password": "change_me_immediately"
-            },
-            timeout=5
+    # Taken from the shared cache on every run, so that a session never holds on to an expired token.
+    try:
+        st.session_state['bearer_token'] = fetch_bearer_token(
+            username=R2R_USERNAME,
+            password=R2R_PASSWORD
         )
-
-        if response.status_code != 200:
-            st.error(f"Failed to fetch system settings: {response.status_code} - {response.text}")
-        else:
-            st.session_state['bearer_token'] = response.json()['results']['access_token']['token']
+    except requests.HTTPError as e:
+        st.error(str(e))
+
+    # Collection of the current chunking configuration, documents are ingested into it
+    # and the search is restricted to it. See `backend/chunking_collections.py`.
+    # Looked up on every run (the id is cached), so that a recreated collection is picked up.
+    try:
+        st.session_state['collection_id'] = ensure_chunking_collection(
+            chunk_size=st.session_state['chunk_size'],
+            chunk_overlap=st.session_state['chunk_overlap'],
+            bearer_token=st.session_state['bearer_token']
+        )
+    except requests.HTTPError as e:
+        st.error(str(e))
 
     # Default prompt name that is used by r2r when interacting with /rag endpoint
     # You can specify a custom name in the application itself
@@ -163,18 +194,19 @@ if __name__ == "__main__":
 
     # The actual template of the prompt
     if 'prompt_template' not in st.session_state:
-        response: requests.Response = requests.post(
-            url=f"http://r2r:7272/v3/prompts/{st.session_state['selected_prompt']}",
-            headers={
-                "Authorization": f"Bearer {st.session_state['bearer_token']}"
-            },
-            timeout=5
-        )
-
-        if response.status_code != 200:
-            st.error(f"Failed to fetch system settings: {response.status_code} - {response.text}")
+        try:
+            # Shared across sessions, see `backend/prompt.py`
+            prompt: Union[RegisteredPrompt, None] = prompt_registry().get(
+                st.session_state['selected_prompt'],
+                st.session_state['bearer_token']
+            )
+        except requests.HTTPError as e:
+            st.error(str(e))
         else:
-            st.session_state['prompt_template'] = response.json()['results']['template']
+            if prompt is None:
+                st.error(f"Prompt {st.session_state['selected_prompt']} doesn't exist!")
+            else:
+                st.session_state['prompt_template'] = prompt.template
 
     # It's part of a tool call, that can fetch data from the internet.
     if 'websearch_api_key' not in st.session_state:
@@ -192,5 +224,14 @@ if __name__ == "__main__":
     if "ollama_api_base" not in st.session_state:
         st.session_state['ollama_api_base'] = os.getenv("OLLAMA_API_BASE")
 
+    # Executes the background jobs (see `st_jobs.py`), including the ones queued before a restart.
+    # The handlers of the jobs are registered by `backend.storage`.
+    from backend.storage import schedule_backfill # pylint: disable=C0415
+    job_worker()
+    # Documents ingested before the chunking collections existed would be missing from the search
+    schedule_backfill(int(os.getenv("CHUNK_SIZE")), int(os.getenv("CHUNK_OVERLAP")))
+    # Samples the index statistics (see `st_index.py`) whether or not someone has the Indices page open
+    index_stats_sampler()
+
     # Run selected page
     page.run()
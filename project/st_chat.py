@@ -3,7 +3,7 @@
 # pylint: disable=C0301
 # pylint: disable=E0401
 
-from typing import List, Union, Dict
+from typing import List, Union, Dict, Final
 
 import streamlit as st
 
@@ -16,9 +16,60 @@ from backend.chat import (
     submit_query
 )
 
+# Only the most recent messages are rendered, older ones are loaded on demand
+HISTORY_PAGE_SIZE: Final[int] = 20
+
+def _load_older_messages():
+    st.session_state['visible_messages'] += HISTORY_PAGE_SIZE
+
+# Interacting with the chat reruns only this fragment, not the sidebar or the rest of the page.
+@st.fragment
+def _chat_view():
+    if not st.session_state.messages and not st.session_state['conversation_id']:
+        st.info("Select a conversation or submit a query to get started")
+    else:
+        hidden: int = max(len(st.session_state.messages) - st.session_state['visible_messages'], 0)
+        if hidden:
+            st.button(
+                label=f"Load older messages ({hidden} hidden)",
+                key="load_older_msgs_btn",
+                on_click=_load_older_messages
+            )
+
+        for msg in st.session_state.messages[hidden:]:
+            role: str = msg['role']
+            content: str = msg['content']
+            with st.chat_message(role, avatar="🤖" if role == "assistant" else "😎"):
+                st.write(content)
+
+    query: Union[str, None] = st.chat_input(placeholder="Please enter your question here ...")
+    if query:
+        with st.chat_message("user", avatar="😎"):
+            st.write(query)
+
+        created: bool = False
+        if not check_conversation_exists():
+            create_conversation()
+            created = True
+
+        add_message({"role": "user", "content": query})
+
+        with st.chat_message("assistant", avatar="🤖"):
+            response: str = submit_query()
+            st.write(response)
+
+        add_message({"role": "assistant", "content": response})
+
+        # The sidebar lives outside of the fragment and has to show the new conversation id
+        if created:
+            st.rerun(scope="app")
+
 if __name__ == "__page__":
     st.title("💬 Chatbot")
 
+    if "visible_messages" not in st.session_state:
+        st.session_state['visible_messages'] = HISTORY_PAGE_SIZE
+
     with st.sidebar:
         if st.session_state['conversation_id']:
             st.markdown(f"**Selected conversation:**  \n{st.session_state['conversation_id']}")
@@ -46,6 +97,7 @@ if __name__ == "__page__":
                     st.session_state['conversation_id'] = selected_conversation_id
                     st.session_state['messages'] = msgs
                     st.session_state['parent_id'] = st.session_state.messages[-1]['id']
+                    st.session_state['visible_messages'] = HISTORY_PAGE_SIZE
                     st.rerun() # To display messages
 
         # A button to start a new conversation
@@ -57,6 +109,7 @@ if __name__ == "__page__":
             st.session_state['conversation_id'] = None
             st.session_state['messages'] = []
             st.session_state['parent_id'] = None
+            st.session_state['visible_messages'] = HISTORY_PAGE_SIZE
             st.rerun()
 
         # Select a different prompt from the default one
@@ -76,7 +129,13 @@ if __name__ == "__page__":
                 if set_new_prompt(new_prompt_name):
                     st.success(body=f"Selected prompt: {new_prompt_name}")
                 else:
-                    st.error(body=f"Prompt: {new_prompt_name} doesn't exist!")
+                    st.error(body=f"Prompt: {new_prompt_name} doesn't exist or lacks the {{context}} and {{query}} placeholders!")
+
+        st.toggle(
+            label="Drop near-duplicate context",
+            key="exclude_duplicate_context",
+            help="Removes near-identical chunks (e.g. repeated headers and footers) from the retrieved context, so they don't crowd out the top k"
+        )
 
         st.markdown("""
 ### About the Chatbot
@@ -114,7 +173,8 @@ Each conversation maintains a full history of user and assistant messages. Based
     if st.session_state['conversation_id'] and not st.session_state['messages']:
         with st.spinner("Loading conversation..."):
             messages: Union[List[Dict[str, str]], None] = retrieve_messages(
-                st.session_state['conversation_id']
+                st.session_state['conversation_id'],
+                leaf_id=st.session_state['parent_id']
             )
             if messages:
                 st.session_state['messages'] = messages
@@ -123,27 +183,4 @@ Each conversation maintains a full history of user and assistant messages. Based
                 st.session_state.messages = []
                 st.session_state['parent_id'] = None
 
-    if not st.session_state.messages and not st.session_state['conversation_id']:
-        st.info("Select a conversation or submit a query to get started")
-    else:
-        for msg in st.session_state.messages:
-            role: str = msg['role']
-            content: str = msg['content']
-            with st.chat_message(role, avatar="🤖" if role == "assistant" else "😎"):
-                st.write(content)
-
-    query: Union[str, None] = st.chat_input(placeholder="Please enter your question here ...")
-    if query:
-        with st.chat_message("user", avatar="😎"):
-            st.write(query)
-
-        if not check_conversation_exists():
-            create_conversation()
-
-        add_message({"role": "user", "content": query})
-
-        with st.chat_message("assistant", avatar="🤖"):
-            response: str = submit_query()
-            st.write(response)
-
-        add_message({"role": "assistant", "content": response})
+    _chat_view()
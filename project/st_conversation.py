@@ -4,11 +4,21 @@
 
 import streamlit as st
 
-from backend.conversation import list_conversations, fetch_messages
+from backend.conversation import list_conversations, refresh_conversations, fetch_messages
+
+# Selecting rows or changing the page reruns only this tab
+@st.fragment
+def _list_conversations_tab():
+    if st.button("Refresh", key="refresh_conv_btn"):
+        refresh_conversations()
+    list_conversations()
 
 if __name__ == "__page__":
     st.title("🗪 Manage conversations")
 
+    if "conversations_page" not in st.session_state:
+        st.session_state['conversations_page'] = 0
+
     with st.sidebar:
         st.markdown("""
 ### About Conversations
@@ -22,7 +32,7 @@ A `conversation` in R2R tracks the full interaction history between a user and t
 
 ---
 
-**Tip**: You can fetch up to 1000 recent conversations using the “Check conversations” button.
+**Tip**: Conversations are listed page by page. Select several rows in the table to delete them at once.
 
 To explore the message history for a specific conversation, paste its ID into the second tab.
 """)
@@ -30,8 +40,7 @@ To explore the message history for a specific conversation, paste its ID into th
     t_list, t_conv_msgs = st.tabs(["List Conversations", "Conversation messages"])
 
     with t_list:
-        if st.button("Check conversations", key="list_conv_btn"):
-            list_conversations()
+        _list_conversations_tab()
 
     with t_conv_msgs:
         conversation_id: str = st.text_input(
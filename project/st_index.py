@@ -8,12 +8,124 @@ https://r2r-docs.sciphi.ai/api-and-sdks/indices/indices
 # pylint: disable=C0301
 # pylint: disable=E0401
 
-from typing import Union
+from typing import Union, Dict, List, Final
 
+import requests
+import pandas as pd
 import streamlit as st
 from streamlit.runtime.uploaded_file_manager import UploadedFile
 
 from backend.index import list_indices, create_index
+from backend.index_build import (
+    BUILD_POLL_SECONDS,
+    IndexBuild,
+    poll_index_builds,
+    forget_finished_builds,
+    representative_queries,
+    start_warmup
+)
+from backend.index_monitor import (
+    SAMPLE_INTERVAL_SECONDS,
+    index_stats_sampler,
+    load_index_stats,
+    summarize_index_stats
+)
+
+STATS_WINDOWS: Final[Dict[str, int]] = {
+    "Last hour": 3600,
+    "Last 24 hours": 86400,
+    "Last 7 days": 604800
+}
+
+def _format_seconds(seconds: Union[float, None]) -> str:
+    if seconds is None:
+        return "unknown"
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}m {seconds:02d}s"
+
+@st.fragment(run_every=BUILD_POLL_SECONDS)
+def _builds_view():
+    builds: List[IndexBuild] = list(st.session_state['index_builds'].values())
+    if not builds:
+        st.info("No index builds requested in this session.")
+        return
+
+    try:
+        poll_index_builds(st.session_state['bearer_token'])
+    except requests.RequestException as e:
+        st.warning(str(e))
+
+    auto_warm: bool = st.checkbox(
+        label="Warm up finished indices",
+        key="auto_warm_indices",
+        value=True,
+        help="Replays the recent queries of this session against an index once it's valid, in the background"
+    )
+    if auto_warm:
+        queries: List[str] = representative_queries()
+        for build in builds:
+            if build.phase == "valid" and queries:
+                start_warmup(build, queries, st.session_state['bearer_token'])
+
+    st.dataframe(
+        data=pd.DataFrame([
+            {
+                "Index": build.name,
+                "Phase": build.phase,
+                "Elapsed": _format_seconds(build.elapsed_seconds),
+                "Progress": None if build.progress is None else build.progress * 100,
+                "ETA": _format_seconds(build.eta_seconds),
+                "Row estimate": f"{build.row_estimate:,} / {build.target_rows:,}",
+                "Size (bytes)": build.size_in_bytes,
+                "Detail": build.detail
+            }
+            for build in builds
+        ]),
+        column_config={
+            "Progress": st.column_config.ProgressColumn(min_value=0, max_value=100, format="%.0f%%")
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+
+    st.button(label="Clear finished", key="clear_index_builds", on_click=forget_finished_builds)
+
+# Refreshes itself whenever a new sample may be available
+@st.fragment(run_every=SAMPLE_INTERVAL_SECONDS)
+def _statistics_tab():
+    sampler = index_stats_sampler()
+    if sampler.last_error:
+        st.warning(f"Last sample failed: {sampler.last_error}")
+
+    window: str = st.selectbox(label="Time window", options=list(STATS_WINDOWS), key="stats_window")
+    stats: pd.DataFrame = load_index_stats(STATS_WINDOWS[window])
+
+    if stats.empty:
+        st.info(f"No samples yet. Statistics are sampled every {SAMPLE_INTERVAL_SECONDS} seconds.")
+        return
+
+    summary: pd.DataFrame = summarize_index_stats(stats)
+    unused = summary.loc[summary['Scans'] == 0, 'Index'].tolist()
+    if unused:
+        st.warning(f"Not scanned in this window: {', '.join(unused)}")
+
+    degrading = summary.loc[
+        summary['Tuples read / scan (recent)'] > 2 * summary['Tuples read / scan (earlier)'],
+        'Index'
+    ].tolist()
+    if degrading:
+        st.warning(f"Tuples read per scan more than doubled: {', '.join(degrading)}")
+
+    st.dataframe(summary, hide_index=True, use_container_width=True)
+
+    st.markdown("**Scans per second**")
+    st.line_chart(stats.pivot_table(index='sampled_at', columns='index_name', values='scans_per_second'))
+
+    st.markdown("**Tuples read per scan**")
+    st.line_chart(stats.pivot_table(index='sampled_at', columns='index_name', values='tuples_read_per_scan'))
+
+    st.markdown("**Size in bytes**")
+    st.line_chart(stats.pivot_table(index='sampled_at', columns='index_name', values='size_in_bytes'))
 
 if __name__ == "__page__":
     st.title("📊 Indices")
@@ -55,7 +167,7 @@ Learn More:
 """)
 
 
-    tab_list, tab_create = st.tabs(["List Indices", "Create Index"])
+    tab_list, tab_create, tab_stats = st.tabs(["List Indices", "Create Index", "Statistics"])
 
     with tab_list:
         if st.button(label="Fetch Indices", key="fetch_indices_btn"):
@@ -65,7 +177,8 @@ Learn More:
         with st.expander("Upload Instructions", expanded=False):
             st.markdown(
                 """Upload a YAML file that defines an index configuration with the following structure.
-Below is an example of a valid YAML configuration for creating an index in R2R."""
+Below is an example of a valid YAML configuration for creating an index in R2R.
+Several indices can be defined in one file, as multiple top-level keys or as multiple YAML documents separated by `---`."""
             )
 
             st.code("""
@@ -83,8 +196,19 @@ Below is an example of a valid YAML configuration for creating an index in R2R."
             type=["yaml", "yml"]
         )
 
-        if st.button(label="Create Index", key="create_index_btn"):
+        dry_run: bool = st.checkbox(
+            label="Dry run",
+            key="index_dry_run",
+            help="Only validate the index definitions, nothing is created"
+        )
+        if st.button(label="Create Indices", key="create_index_btn"):
             if not uploaded_file:
                 st.error("Please upload a YAML file to create an index.")
             else:
-                create_index(uploaded_file)
+                create_index(uploaded_file, dry_run=dry_run)
+
+        st.markdown("**Builds**")
+        _builds_view()
+
+    with tab_stats:
+        _statistics_tab()
@@ -0,0 +1,99 @@
+"""
+Long-running work (file ingestion, webscraping, bulk deletes) can be queued as a job.
+The jobs are persisted and executed by a single worker thread, so they survive page reloads.
+"""
+
+# pylint: disable=C0301
+# pylint: disable=E0401
+# pylint: disable=W0611
+
+from typing import Final
+
+import pandas as pd
+import streamlit as st
+
+import backend.storage # Registers the handlers of the jobs
+from backend.jobs import JOB_STATUSES, job_worker, load_jobs, load_job_events, clear_finished_jobs
+
+REFRESH_SECONDS: Final[int] = 2
+
+def _format_seconds(seconds: float) -> str:
+    if pd.isna(seconds):
+        return ""
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}m {seconds:02d}s"
+
+def _clear_finished():
+    removed: int = clear_finished_jobs()
+    st.toast(f"Removed {removed} finished jobs.")
+
+@st.fragment(run_every=REFRESH_SECONDS)
+def _jobs_view():
+    worker = job_worker()
+    if not worker.is_alive():
+        st.error("The job worker stopped, restart the application to resume the queued jobs.")
+
+    jobs: pd.DataFrame = load_jobs()
+    if jobs.empty:
+        st.info("No jobs yet. Jobs are created on the Documents page.")
+        return
+
+    columns = st.columns(len(JOB_STATUSES) + 1)
+    for column, status in zip(columns, JOB_STATUSES):
+        column.metric(label=status.capitalize(), value=int((jobs['status'] == status).sum()))
+    columns[-1].metric(label="Errors", value=int(jobs['errors'].sum()))
+
+    st.dataframe(
+        data=pd.DataFrame({
+            "Job": jobs['id'],
+            "Title": jobs['title'],
+            "Status": jobs['status'],
+            "Progress": jobs['progress'] * 100,
+            "Items": jobs['done'].astype(str) + " / " + jobs['total'].astype(str),
+            "Items / s": jobs['items_per_second'].round(2),
+            "Errors": jobs['errors'],
+            "Duration": jobs['duration_seconds'].map(_format_seconds),
+            "Created at": jobs['created_at'],
+            "Error": jobs['error']
+        }),
+        column_config={
+            "Progress": st.column_config.ProgressColumn(min_value=0, max_value=100, format="%.0f%%")
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+
+    job_id: int = st.selectbox(
+        label="Show the log of job",
+        options=jobs['id'].tolist(),
+        format_func=lambda job: f"{job} - {jobs.loc[jobs['id'] == job, 'title'].iloc[0]}",
+        key="job_log_id"
+    )
+    events: pd.DataFrame = load_job_events(job_id)
+    if events.empty:
+        st.info("Nothing logged yet.")
+    else:
+        st.dataframe(events, hide_index=True, use_container_width=True)
+
+    st.button(label="Clear finished jobs", key="clear_jobs_btn", on_click=_clear_finished)
+
+if __name__ == "__page__":
+    st.title("⚙️ Jobs")
+
+    with st.sidebar:
+        st.markdown(f"""
+### About Jobs
+
+Ingesting many files or scraping hundreds of URLs takes a while. Instead of blocking the page, these can run as **jobs** in the background.
+
+---
+
+**How it works:**
+
+- Jobs are queued on the **Documents** page: check **Run in background** when ingesting a file or scraping URLs. Deleting all documents is always a job.
+- A single worker executes the jobs one at a time, in the order they were queued.
+- Jobs are persisted, so they survive page reloads. Jobs interrupted by a restart are queued again.
+- The view refreshes every {REFRESH_SECONDS} seconds and shows the progress, throughput and errors of every job.
+""")
+
+    _jobs_view()
@@ -65,6 +65,9 @@ For this project, the most relevant is:
 Below is an example of a custom prompt.
 Make sure you give a `unique name` to the prompt (`custom_rag` in the example below).
 The `template` and `input_types` keys should be defined as shown.
+
+A single file can define several prompts, either as multiple top-level keys or as multiple YAML documents separated by `---`.
+All of them are validated before any is created.
 """)
 
             st.code("""
@@ -96,8 +99,13 @@ The `template` and `input_types` keys should be defined as shown.
             label="Upload YAML Prompt File",
             type=["yaml", "yml"]
         )
-        if st.button(label="Create Prompt", key="create_prompt_btn"):
+        dry_run: bool = st.checkbox(
+            label="Dry run",
+            key="prompt_dry_run",
+            help="Only validate the prompts, nothing is created"
+        )
+        if st.button(label="Create Prompts", key="create_prompt_btn"):
             if uploaded_file is None:
                 st.error(body="Please upload a YAML file.")
             else:
-                create_prompt(uploaded_file)
+                create_prompt(uploaded_file, dry_run=dry_run)
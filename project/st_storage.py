@@ -9,22 +9,268 @@ import streamlit as st
 from streamlit.runtime.uploaded_file_manager import UploadedFile
 
 from st_app import KEY_FILE
+from backend.partitioning import PARTITION_STRATEGIES
+from backend.scraper import ScrapeSettings
+from backend.near_duplicates import DEFAULT_THRESHOLD
 from backend.storage import (
     delete_all_documents,
     fetch_documents,
     fetch_document_chunks,
     ingest_file,
     perform_webscrape,
-    perform_websearch
+    perform_websearch,
+    report_near_duplicates
 )
 
+# Each tab is a fragment, so interacting with one of them reruns only that tab.
+@st.fragment
+def _list_docs_tab():
+    if st.button("Fetch all documents", type="primary", key="fetch_docs_btn"):
+        fetch_documents()
+
+@st.fragment
+def _list_chunks_tab():
+    document_id_chunks: str = st.text_input(
+        label="Enter document id and retrieve corresponding chunks",
+        placeholder="Ex. document_id",
+        value=None
+    )
+
+    if st.button("Fetch Chunks", type="primary", key="fetch_chunks_btn"):
+        if not document_id_chunks:
+            st.error("Please provide a document id.")
+        else:
+            fetch_document_chunks(document_id_chunks.strip())
+
+@st.fragment
+def _near_duplicates_tab():
+    threshold: float = st.slider(
+        label="Similarity threshold",
+        min_value=0.5,
+        max_value=1.0,
+        value=DEFAULT_THRESHOLD,
+        step=0.05,
+        key="near_duplicates_threshold",
+        help="Estimated Jaccard similarity of the word 5-grams of two chunks"
+    )
+
+    if st.button("Find near-duplicates", type="primary", key="near_duplicates_btn"):
+        report_near_duplicates(threshold)
+
+@st.fragment
+def _ingest_file_tab():
+    uploaded_file: Union[UploadedFile, None] = st.file_uploader(
+        label="Choose a file to upload",
+        type=["txt", "pdf", "docx", "csv", "md", "html", "json"]
+    )
+
+    strategy: str = st.selectbox(
+        label="Partitioning strategy",
+        options=PARTITION_STRATEGIES,
+        key="ingest_strategy",
+        help="`auto` uses `fast` for text files and PDFs with a text layer, `hi_res` otherwise"
+    )
+
+    normalize_text: bool = st.checkbox(
+        label="Normalize text",
+        value=True,
+        key="ingest_normalize",
+        help="Converts markdown and HTML to plain text and collapses whitespace before uploading"
+    )
+
+    update: bool = st.checkbox(
+        label="Update if it exists",
+        value=False,
+        key="ingest_update",
+        help="Re-embeds only the chunks that changed compared to the ingested version of the file"
+    )
+
+    skip_duplicates: bool = st.checkbox(
+        label="Skip near-duplicate chunks",
+        value=False,
+        key="ingest_skip_duplicates",
+        disabled=update,
+        help="Doesn't ingest chunks that are near-identical to each other or to chunks already in the knowledge base. Not available for updates"
+    ) and not update
+
+    background: bool = st.checkbox(
+        label="Run in background",
+        value=False,
+        key="ingest_background",
+        help="Queues the ingestion as a job, its progress is shown on the Jobs page. Updates always run right away"
+    )
+
+    if st.button("Ingest Document", type="primary", key="ingest_doc_btn"):
+        if not uploaded_file:
+            st.error("Please upload a file.")
+        else:
+            ingest_file(
+                uploaded_file,
+                strategy=strategy,
+                normalize_text=normalize_text,
+                update=update,
+                skip_duplicates=skip_duplicates,
+                background=background
+            )
+
+@st.fragment
+def _websearch_tab():
+    with st.expander("Instructions on how to use it", expanded=True, icon="📖"):
+        st.markdown(f"""
+        * First go to this website: [langsearch](https://langsearch.com/)
+        * Create a free account and login
+        * Get an API key that looks like this: `sk-****************`
+        * Enter your API key in the field below. It will store it under `{KEY_FILE}`.
+        * Finally, submit a query and number of web pages
+        * You will get a response and a list of web pages that match your query       
+        * You can use the links to create a csv file to then perform a webscrape
+        """)
+
+    provided_api_key: str = st.text_input(
+        label="Enter your API key",
+        key="api_key_input",
+        value=st.session_state['websearch_api_key']
+    )
+
+    if st.button("Set API key", type="primary", key="set_api_key_btn"):
+        if not provided_api_key:
+            st.error("Please enter an API key.")
+        else:
+            if not provided_api_key.startswith("sk-"):
+                st.error("Please enter a valid API key.")
+            elif provided_api_key == st.session_state['websearch_api_key']:
+                st.error("Please enter a different API key.")
+            else:
+                st.session_state['websearch_api_key'] = provided_api_key.strip()
+                # Persist the key
+                KEY_FILE.write_text(provided_api_key.strip(), encoding="utf-8")
+                st.success("API key updated and persisted.")
+
+    query: str = st.text_input(
+        label="Enter query",
+        key="query_input",
+        placeholder="What is the capital of France?"
+    )
+
+    results_to_return = st.slider(
+        label="Number of results to return",
+        min_value=1,
+        max_value=10,
+        value=5,
+        step=1,
+        help="The number of web pages to be considered by the tool"
+    )
+
+    if st.button("Search", type="primary", key="websearch_btn"):
+        if not st.session_state['websearch_api_key']:
+            st.error("Please enter an API key.")
+        else:
+            if not query:
+                st.error("Please enter a query.")
+            else:
+                with st.spinner("Performing web search...", show_time=True):
+                    result, urls = perform_websearch(query.strip(), results_to_return)
+
+                formatted_urls: str = ""
+                for i, url in enumerate(urls, 1):
+                    formatted_urls += f"{i}. [{url}]({url})\n"
+
+                st.markdown(f"""### Response
+{result}
+
+### Relevant URLs:
+{formatted_urls}
+            """)
+
+@st.fragment
+def _webscrape_tab():
+    uploaded_url_file: Union[UploadedFile, None] = st.file_uploader(
+        label="Choose file containing URLs",
+        type="csv",
+        help="Supported formats: CSV"
+    )
+
+    strategy: str = st.selectbox(
+        label="Partitioning strategy",
+        options=PARTITION_STRATEGIES,
+        key="webscrape_strategy",
+        help="`auto` uses `fast`, since the scraped pages are plain text"
+    )
+
+    normalize_text: bool = st.checkbox(
+        label="Remove boilerplate",
+        value=True,
+        key="webscrape_normalize",
+        help="Strips scripts, styles, navigation, headers and footers from the pages before uploading"
+    )
+
+    refresh: bool = st.checkbox(
+        label="Refresh existing pages",
+        value=False,
+        key="webscrape_refresh",
+        help="Revalidates pages that were already ingested and re-ingests only the ones whose content changed"
+    )
+
+    skip_duplicates: bool = st.checkbox(
+        label="Skip near-duplicate chunks",
+        value=False,
+        key="webscrape_skip_duplicates",
+        help="Doesn't ingest repeated headers, footers and other chunks near-identical to ones already in the knowledge base"
+    )
+
+    background: bool = st.checkbox(
+        label="Run in background",
+        value=False,
+        key="webscrape_background",
+        help="Queues the scrape as a job, its progress is shown on the Jobs page"
+    )
+
+    with st.expander("Scraper settings", expanded=False):
+        defaults = ScrapeSettings()
+        scrape_settings = ScrapeSettings(
+            max_concurrency=st.number_input(
+                label="Concurrent requests", min_value=1, max_value=64,
+                value=defaults.max_concurrency, key="scrape_max_concurrency"
+            ),
+            per_host_concurrency=st.number_input(
+                label="Concurrent requests per host", min_value=1, max_value=8,
+                value=defaults.per_host_concurrency, key="scrape_per_host_concurrency"
+            ),
+            per_host_delay_seconds=st.number_input(
+                label="Delay between requests to the same host (s)", min_value=0.0, max_value=30.0,
+                value=defaults.per_host_delay_seconds, step=0.5, key="scrape_per_host_delay"
+            ),
+            timeout_seconds=st.number_input(
+                label="Timeout per request (s)", min_value=1.0, max_value=120.0,
+                value=defaults.timeout_seconds, step=5.0, key="scrape_timeout"
+            ),
+            retries=st.number_input(
+                label="Retries", min_value=0, max_value=5,
+                value=defaults.retries, key="scrape_retries"
+            )
+        )
+
+    if st.button("Ingest data from URLs", type="primary", key="webscrape_btn"):
+        if not uploaded_url_file:
+            st.error("Please upload a file containing URLs.")
+        else:
+            perform_webscrape(
+                uploaded_url_file,
+                strategy=strategy,
+                normalize_text=normalize_text,
+                scrape_settings=scrape_settings,
+                refresh=refresh,
+                skip_duplicates=skip_duplicates,
+                background=background
+            )
+
 if __name__ == "__page__":
     st.title("📄 Document Management")
 
     with st.sidebar:
         with st.popover(
             label="Delete all documents",
-            help="Remove all documents from the knowledge base",
+            help="Remove all documents from the knowledge base in a background job",
             icon="🗑️"
         ):
             delete_all_docs_btn = st.button(
@@ -44,126 +290,38 @@ Documents in R2R are the core knowledge units used for retrieval and answering u
 
 - **List Docs**: View all documents in your current knowledge base.
 - **List Chunks**: Inspect the individual content chunks and metadata per document.
+- **Near Duplicates**: Find clusters of near-identical chunks and estimate what removing them would save.
 - **Ingest File**: Upload supported files (`.txt`, `.pdf`, `.docx`, etc.) to be chunked and stored.
 - **Web Search**: Use an LLM tool-call to fetch a response relative to query and URLs containing information (perfect for webscraping).
 - **Webscrape**: Upload a csv file with URLs, scrape content from each, and ingest it as documents.
 
+Ingestion and webscraping can **run in background**, their progress is shown on the **Jobs** page.
+
 """)
 
-    t_list, t_chunks, t_file_ingest, t_websearch, t_webscrape = st.tabs([
+    t_list, t_chunks, t_duplicates, t_file_ingest, t_websearch, t_webscrape = st.tabs([
         "List Docs",
         "List Chunks",
+        "Near Duplicates",
         "Ingest File",
         "Web Search",
         "Webscrape"
     ])
 
     with t_list:
-        if st.button("Fetch all documents", type="primary", key="fetch_docs_btn"):
-            fetch_documents()
+        _list_docs_tab()
 
     with t_chunks:
-        document_id_chunks: str = st.text_input(
-            label="Enter document id and retrieve corresponding chunks",
-            placeholder="Ex. document_id",
-            value=None
-        )
+        _list_chunks_tab()
 
-        if st.button("Fetch Chunks", type="primary", key="fetch_chunks_btn"):
-            if not document_id_chunks:
-                st.error("Please provide a document id.")
-            else:
-                fetch_document_chunks(document_id_chunks.strip())
+    with t_duplicates:
+        _near_duplicates_tab()
 
     with t_file_ingest:
-        uploaded_file: Union[UploadedFile, None] = st.file_uploader(
-            label="Choose a file to upload",
-            type=["txt", "pdf", "docx", "csv", "md", "html", "json"]
-        )
-
-        if st.button("Ingest Document", type="primary", key="ingest_doc_btn"):
-            if not uploaded_file:
-                st.error("Please upload a file.")
-            else:
-                ingest_file(uploaded_file)
+        _ingest_file_tab()
 
     with t_websearch:
-        with st.expander("Instructions on how to use it", expanded=True, icon="📖"):
-            st.markdown(f"""
-            * First go to this website: [langsearch](https://langsearch.com/)
-            * Create a free account and login
-            * Get an API key that looks like this: `sk-****************`
-            * Enter your API key in the field below. It will store it under `{KEY_FILE}`.
-            * Finally, submit a query and number of web pages
-            * You will get a response and a list of web pages that match your query       
-            * You can use the links to create a csv file to then perform a webscrape
-            """)
-
-        provided_api_key: str = st.text_input(
-            label="Enter your API key",
-            key="api_key_input",
-            value=st.session_state['websearch_api_key']
-        )
-
-        if st.button("Set API key", type="primary", key="set_api_key_btn"):
-            if not provided_api_key:
-                st.error("Please enter an API key.")
-            else:
-                if not provided_api_key.startswith("sk-"):
-                    st.error("Please enter a valid API key.")
-                elif provided_api_key == st.session_state['websearch_api_key']:
-                    st.error("Please enter a different API key.")
-                else:
-                    st.session_state['websearch_api_key'] = provided_api_key.strip()
-                    # Persist the key
-                    KEY_FILE.write_text(provided_api_key.strip(), encoding="utf-8")
-                    st.success("API key updated and persisted.")
-
-        query: str = st.text_input(
-            label="Enter query",
-            key="query_input",
-            placeholder="What is the capital of France?"
-        )
-
-        results_to_return = st.slider(
-            label="Number of results to return",
-            min_value=1,
-            max_value=10,
-            value=5,
-            step=1,
-            help="The number of web pages to be considered by the tool"
-        )
-
-        if st.button("Search", type="primary", key="websearch_btn"):
-            if not st.session_state['websearch_api_key']:
-                st.error("Please enter an API key.")
-            else:
-                if not query:
-                    st.error("Please enter a query.")
-                else:
-                    with st.spinner("Performing web search...", show_time=True):
-                        result, urls = perform_websearch(query.strip(), results_to_return)
-
-                    formatted_urls: str = ""
-                    for i, url in enumerate(urls, 1):
-                        formatted_urls += f"{i}. [{url}]({url})\n"
-
-                    st.markdown(f"""### Response
-{result}
-
-### Relevant URLs:
-{formatted_urls}
-                """)
+        _websearch_tab()
 
     with t_webscrape:
-        uploaded_url_file: Union[UploadedFile, None] = st.file_uploader(
-            label="Choose file containing URLs",
-            type="csv",
-            help="Supported formats: CSV"
-        )
-
-        if st.button("Ingest data from URLs", type="primary", key="webscrape_btn"):
-            if not uploaded_url_file:
-                st.error("Please upload a file containing URLs.")
-            else:
-                perform_webscrape(uploaded_url_file)
+        _webscrape_tab()